@@ -1,6 +1,6 @@
 #!/usr/bin/env python3
 """
-AI worker for VoiceMCP using LangChain and OpenAI.
+AI worker for VoiceMCP using the OpenAI SDK.
 Handles title generation and summarization from transcripts.
 Communicates with Node.js via JSON messages over stdout/stderr.
 """
@@ -11,16 +11,19 @@ import argparse
 import traceback
 import os
 import warnings
-from typing import Dict, Any, Optional
+import logging
+import asyncio
+import re
+from pathlib import Path
+from typing import Dict, Any, Optional, Tuple
 
 # Suppress warnings
 warnings.filterwarnings("ignore")
 os.environ["PYTHONWARNINGS"] = "ignore"
 
 try:
-    from langchain_openai import ChatOpenAI
-    from langchain.prompts import ChatPromptTemplate
-    from langchain.schema import HumanMessage, SystemMessage
+    import orjson
+    from openai import OpenAI, AsyncOpenAI
 except ImportError as e:
     print(json.dumps({
         "type": "error",
@@ -29,13 +32,83 @@ except ImportError as e:
     sys.exit(1)
 
 
+# Static system prompt for title + summary generation. Kept byte-stable so it
+# forms a cacheable prefix; all per-call content goes in the user message.
+TITLE_AND_SUMMARY_SYSTEM_PROMPT = """You are an expert at creating concise, descriptive titles and informative summaries of audio transcripts.
+Respond with a JSON object containing a "title" and a "summary" for the transcript.
+
+Title guidelines:
+- Generate a clear, specific title that captures the main topic or purpose of the conversation
+- Keep it under 60 characters
+- Be specific and descriptive
+- Use title case
+- Avoid generic words like "Recording" or "Audio"
+- Focus on the main topic, purpose, or key discussion points
+
+Title examples:
+- "Weekly Team Standup - Sprint Planning"
+- "Customer Interview - Product Feedback"
+- "Board Meeting - Q4 Budget Review"
+- "Training Session - New Employee Onboarding"
+
+Summary guidelines:
+- Generate a clear summary that captures the key points, decisions, and outcomes
+- Keep it between 100-300 words
+- Use bullet points for key items when appropriate
+- Focus on actionable items, decisions, and important information
+- Be objective and factual
+- Include relevant context and outcomes
+- Format it as a well-structured summary with clear sections if needed
+"""
+
+# Structured output schema for the combined title + summary response
+TITLE_AND_SUMMARY_FORMAT = {
+    "type": "json_schema",
+    "json_schema": {
+        "name": "meta",
+        "schema": {
+            "type": "object",
+            "properties": {
+                "title": {"type": "string", "maxLength": 60},
+                "summary": {"type": "string"}
+            },
+            "required": ["title", "summary"]
+        }
+    }
+}
+
+# Models that accept json_schema structured outputs; the rest get plain JSON mode
+STRUCTURED_OUTPUT_MODEL_PREFIXES = ("gpt-4o", "gpt-4.1")
+JSON_OBJECT_FORMAT = {"type": "json_object"}
+
+# A 300-word summary is ~400 tokens before JSON escaping; leave room for the title and closing brace
+TITLE_AND_SUMMARY_MAX_TOKENS = 1024
+
+# The title is generated first, so it survives a response cut off inside the summary
+TITLE_FIELD_PATTERN = re.compile(r'"title"\s*:\s*"((?:[^"\\]|\\.)*)"')
+
+# Diagnostics go to stderr; set VOICEMCP_LOG=DEBUG to enable them
+logging.basicConfig(stream=sys.stderr, format="[%(levelname)s] %(message)s")
+logger = logging.getLogger("ai_worker")
+_log_level = logging.getLevelName(os.getenv("VOICEMCP_LOG", "WARNING").upper())
+logger.setLevel(_log_level if isinstance(_log_level, int) else logging.WARNING)  # Unknown names fall back
+
+# Concurrent OpenAI requests in manifest mode, kept low to respect rate limits
+MANIFEST_CONCURRENCY = 8
+
+# Messages are written as bytes straight to stdout's buffer, one write per message
+_write = sys.stdout.buffer.write
+_flush = sys.stdout.buffer.flush
+
+
 def emit_message(message_type: str, **kwargs) -> None:
     """Send a JSON message to the parent process via stdout."""
     message = {
         "type": message_type,
         **kwargs
     }
-    print(json.dumps(message), flush=True)
+    _write(orjson.dumps(message, option=orjson.OPT_APPEND_NEWLINE))
+    _flush()
 
 
 def emit_progress(progress: int, message: str = "") -> None:
@@ -53,95 +126,91 @@ def emit_result(title: str, summary: str) -> None:
     emit_message("result", title=title, summary=summary)
 
 
-def create_openai_client(api_key: str, model: str = "gpt-4o") -> ChatOpenAI:
-    """Create OpenAI client with LangChain."""
+def create_openai_client(api_key: str) -> OpenAI:
+    """Create OpenAI client."""
     try:
-        return ChatOpenAI(
-            model=model,
-            temperature=0,
+        return OpenAI(
             api_key=api_key,
-            max_retries=3,
-            request_timeout=60
+            timeout=60,
+            max_retries=3
         )
     except Exception as e:
         emit_error(f"Failed to create OpenAI client: {str(e)}", traceback.format_exc())
         raise
 
 
-def generate_title(llm: ChatOpenAI, transcript: str) -> str:
-    """Generate a concise title from the transcript."""
+def build_title_and_summary_request(transcript: str, model: str = "gpt-4o") -> Dict[str, Any]:
+    """Build the chat completion request body for title and summary generation."""
+    messages = [
+        {"role": "system", "content": TITLE_AND_SUMMARY_SYSTEM_PROMPT},
+        {"role": "user", "content": f"Generate a title and summary for this transcript:\n\n{transcript}"}
+    ]
+    
+    return {
+        "model": model,
+        "messages": messages,
+        "temperature": 0,
+        "max_tokens": TITLE_AND_SUMMARY_MAX_TOKENS,
+        "response_format": (TITLE_AND_SUMMARY_FORMAT if model.startswith(STRUCTURED_OUTPUT_MODEL_PREFIXES)
+                            else JSON_OBJECT_FORMAT)
+    }
+
+
+def parse_title_and_summary(content: str, finish_reason: Optional[str] = None) -> Dict[str, str]:
+    """Parse the title and summary response, keeping the title if the summary was cut off."""
+    if finish_reason == "length":
+        logger.warning("Title and summary response reached max_tokens")
+    
     try:
-        emit_progress(25, "Generating title...")
-        
-        # Create title generation prompt
-        title_prompt = ChatPromptTemplate.from_messages([
-            ("system", """You are an expert at creating concise, descriptive titles for audio transcripts. 
-            Generate a clear, specific title that captures the main topic or purpose of the conversation.
-            
-            Guidelines:
-            - Keep it under 60 characters
-            - Be specific and descriptive
-            - Use title case
-            - Avoid generic words like "Recording" or "Audio"
-            - Focus on the main topic, purpose, or key discussion points
-            
-            Examples:
-            - "Weekly Team Standup - Sprint Planning"
-            - "Customer Interview - Product Feedback"
-            - "Board Meeting - Q4 Budget Review"
-            - "Training Session - New Employee Onboarding"
-            """),
-            ("human", "Generate a title for this transcript:\n\n{transcript}")
-        ])
-        
-        # Generate title
-        chain = title_prompt | llm
-        result = chain.invoke({"transcript": transcript[:2000]})  # Limit input length
-        
-        title = result.content.strip().strip('"').strip("'")
-        emit_progress(50, "Title generated")
-        
-        return title
-        
-    except Exception as e:
-        emit_error(f"Title generation failed: {str(e)}", traceback.format_exc())
-        return "Untitled Recording"
+        data = orjson.loads(content)
+    except orjson.JSONDecodeError:
+        if finish_reason != "length":
+            raise
+        match = TITLE_FIELD_PATTERN.search(content)
+        data = {"title": orjson.loads(f'"{match.group(1)}"')} if match else {}
+    
+    title = str(data.get("title", "")).strip().strip('"').strip("'")
+    summary = str(data.get("summary", "")).strip()
+    
+    return {
+        "title": title or "Untitled Recording",
+        "summary": summary or "Summary generation failed."
+    }
+
+
+def log_prompt_usage(response: Any) -> None:
+    """Report prompt cache effectiveness; the static system prompt is the shared prefix."""
+    usage = getattr(response, "usage", None)
+    if usage is not None:
+        details = getattr(usage, "prompt_tokens_details", None)
+        cached_tokens = getattr(details, "cached_tokens", 0) or 0
+        logger.debug(f"Prompt tokens: {usage.prompt_tokens}, cached: {cached_tokens}")
 
 
-def generate_summary(llm: ChatOpenAI, transcript: str) -> str:
-    """Generate a summary from the transcript."""
+def generate_title_and_summary(llm: OpenAI, transcript: str, model: str = "gpt-4o") -> Dict[str, str]:
+    """Generate a title and a summary from the transcript in a single request."""
     try:
-        emit_progress(75, "Generating summary...")
+        emit_progress(25, "Generating title and summary...")
         
-        # Create summary generation prompt
-        summary_prompt = ChatPromptTemplate.from_messages([
-            ("system", """You are an expert at creating concise, informative summaries of audio transcripts.
-            Generate a clear summary that captures the key points, decisions, and outcomes.
-            
-            Guidelines:
-            - Keep it between 100-300 words
-            - Use bullet points for key items when appropriate
-            - Focus on actionable items, decisions, and important information
-            - Be objective and factual
-            - Include relevant context and outcomes
-            
-            Format your response as a well-structured summary with clear sections if needed.
-            """),
-            ("human", "Generate a summary for this transcript:\n\n{transcript}")
-        ])
+        excerpt = transcript[:4000]  # Limit input length
         
-        # Generate summary
-        chain = summary_prompt | llm
-        result = chain.invoke({"transcript": transcript[:4000]})  # Limit input length
+        # Generate title and summary together
+        response = llm.chat.completions.create(**build_title_and_summary_request(excerpt, model))
         
-        summary = result.content.strip()
-        emit_progress(95, "Summary generated")
+        log_prompt_usage(response)
         
-        return summary
+        choice = response.choices[0]
+        result = parse_title_and_summary(choice.message.content, choice.finish_reason)
+        emit_progress(90, "Title and summary generated")
+        
+        return result
         
     except Exception as e:
-        emit_error(f"Summary generation failed: {str(e)}", traceback.format_exc())
-        return "Summary generation failed."
+        emit_error(f"Title and summary generation failed: {str(e)}", traceback.format_exc())
+        return {
+            "title": "Untitled Recording",
+            "summary": "Summary generation failed."
+        }
 
 
 def process_transcript(api_key: str, transcript: str, model: str = "gpt-4o") -> Dict[str, str]:
@@ -157,67 +226,207 @@ def process_transcript(api_key: str, transcript: str, model: str = "gpt-4o") ->
             raise ValueError("Transcript is too short or empty")
         
         # Create OpenAI client
-        llm = create_openai_client(api_key, model)
+        llm = create_openai_client(api_key)
         emit_progress(10, "OpenAI client initialized")
         
-        # Generate title
-        title = generate_title(llm, transcript)
-        
-        # Generate summary
-        summary = generate_summary(llm, transcript)
+        # Generate title and summary
+        result = generate_title_and_summary(llm, transcript, model)
         
         emit_progress(100, "AI processing complete")
         
-        return {
-            "title": title,
-            "summary": summary
-        }
+        return result
         
     except Exception as e:
         emit_error(f"AI processing failed: {str(e)}", traceback.format_exc())
         raise
 
 
+def submit_batch(llm: OpenAI, transcript: str, model: str = "gpt-4o", custom_id: str = "transcript") -> str:
+    """Submit title and summary generation through the Batch API and return the batch id."""
+    emit_progress(25, "Submitting batch request...")
+    
+    line = {
+        "custom_id": custom_id,
+        "method": "POST",
+        "url": "/v1/chat/completions",
+        "body": build_title_and_summary_request(transcript[:4000], model)
+    }
+    
+    batch_input = llm.files.create(
+        file=("batch.jsonl", orjson.dumps(line) + b"\n"),
+        purpose="batch"
+    )
+    batch = llm.batches.create(
+        input_file_id=batch_input.id,
+        endpoint="/v1/chat/completions",
+        completion_window="24h"
+    )
+    
+    emit_progress(90, "Batch request submitted")
+    return batch.id
+
+
+def collect_batch(llm: OpenAI, batch_id: str) -> Optional[Dict[str, str]]:
+    """Fetch the result of a submitted batch, or None if it has not completed yet."""
+    emit_progress(25, "Checking batch status...")
+    
+    batch = llm.batches.retrieve(batch_id)
+    if batch.status in ("failed", "expired", "cancelled"):
+        errors = getattr(batch.errors, "data", None) or []
+        detail = f": {errors[0].message}" if errors else ""
+        raise ValueError(f"Batch {batch_id} {batch.status}{detail}")
+    
+    if batch.status != "completed":
+        emit_message("batch_pending", batch_id=batch_id, status=batch.status)
+        return None
+    
+    # A request that failed is written to the error file instead of the output file
+    result_file_id = batch.output_file_id or batch.error_file_id
+    if not result_file_id:
+        raise ValueError(f"Batch {batch_id} completed without output")
+    
+    output = llm.files.content(result_file_id).content
+    line = orjson.loads(output.splitlines()[0])
+    response = line.get("response") or {}
+    body = response.get("body") or {}
+    
+    if line.get("error") or response.get("status_code") != 200:
+        error = line.get("error") or body.get("error") or {}
+        message = error.get("message") or f"HTTP {response.get('status_code')}"
+        raise ValueError(f"Batch {batch_id} request failed: {message}")
+    
+    emit_progress(90, "Batch result retrieved")
+    choice = body["choices"][0]
+    return parse_title_and_summary(choice["message"]["content"], choice.get("finish_reason"))
+
+
+def load_transcript_text(transcript_file: str) -> str:
+    """Load the transcript text from a transcript JSON file."""
+    with open(transcript_file, 'rb') as f:
+        transcript_data = orjson.loads(f.read())
+    
+    # Extract transcript text - handle both formats
+    transcript_text = ""
+    if "text" in transcript_data:
+        # Direct format
+        transcript_text = transcript_data["text"]
+    elif "result" in transcript_data and "text" in transcript_data["result"]:
+        # Nested format from WhisperService
+        transcript_text = transcript_data["result"]["text"]
+    else:
+        raise ValueError("No transcript text found in file")
+    
+    if not transcript_text or len(transcript_text.strip()) < 10:
+        raise ValueError("Transcript text is too short or empty")
+    
+    return transcript_text
+
+
+async def process_transcript_async(
+    llm: AsyncOpenAI,
+    semaphore: asyncio.Semaphore,
+    item: Dict[str, Any],
+    model: str = "gpt-4o"
+) -> Tuple[str, Optional[Dict[str, str]], Optional[str]]:
+    """Generate a title and summary for one manifest entry, returning (id, result, error)."""
+    item_id = str(item.get("id", item.get("transcript_path", "")))
+    try:
+        transcript = load_transcript_text(item["transcript_path"])
+        excerpt = transcript[:4000]  # Limit input length
+        
+        async with semaphore:
+            response = await llm.chat.completions.create(**build_title_and_summary_request(excerpt, model))
+        log_prompt_usage(response)
+        choice = response.choices[0]
+        result = parse_title_and_summary(choice.message.content, choice.finish_reason)
+        
+        return item_id, result, None
+        
+    except Exception as e:
+        logger.debug(f"Manifest entry {item_id} failed", exc_info=True)
+        return item_id, None, str(e)
+
+
+async def process_manifest(api_key: str, manifest_file: str, model: str = "gpt-4o") -> None:
+    """Process every transcript listed in a JSONL manifest with concurrent OpenAI requests."""
+    emit_progress(5, "Loading manifest...")
+    with open(manifest_file, 'rb') as f:
+        items = [orjson.loads(line) for line in f if line.strip()]
+    
+    if not items:
+        raise ValueError("Manifest contains no transcripts")
+    
+    llm = AsyncOpenAI(api_key=api_key, timeout=60, max_retries=3)
+    semaphore = asyncio.Semaphore(MANIFEST_CONCURRENCY)
+    emit_progress(10, f"Processing {len(items)} transcripts...")
+    
+    tasks = [process_transcript_async(llm, semaphore, item, model) for item in items]
+    
+    # Emit each result as soon as it is ready so the parent sees progress
+    for completed, task in enumerate(asyncio.as_completed(tasks), start=1):
+        item_id, result, error = await task
+        if error is not None:
+            emit_message("transcript_error", id=item_id, error=error)
+        else:
+            emit_message("transcript_result", id=item_id, title=result["title"], summary=result["summary"])
+        emit_progress(10 + completed * 90 // len(items), f"Processed {completed}/{len(items)} transcripts")
+
+
 def main():
     """Main entry point for the AI worker."""
     parser = argparse.ArgumentParser(description="AI worker for title and summary generation")
-    parser.add_argument("transcript_file", help="Path to transcript JSON file")
+    parser.add_argument("transcript_file", nargs="?", help="Path to transcript JSON file")
     parser.add_argument("--api-key", required=True, help="OpenAI API key")
     parser.add_argument("--model", default="gpt-4o", help="OpenAI model to use (default: gpt-4o)")
     parser.add_argument("--output", help="Output file for AI results (optional)")
+    parser.add_argument("--batch", action="store_true",
+                       help="Submit through the OpenAI Batch API (50%% cheaper, results within 24h) and exit")
+    parser.add_argument("--batch-id", help="Collect the result of a previously submitted batch")
+    parser.add_argument("--manifest",
+                       help="JSONL file of {\"id\": ..., \"transcript_path\": ...} lines to process concurrently")
     
     args = parser.parse_args()
     
     try:
         emit_progress(0, "Starting AI worker")
         
-        # Load transcript
-        emit_progress(5, "Loading transcript...")
-        with open(args.transcript_file, 'r', encoding='utf-8') as f:
-            transcript_data = json.load(f)
-        
-        # Extract transcript text - handle both formats
-        transcript_text = ""
-        if "text" in transcript_data:
-            # Direct format
-            transcript_text = transcript_data["text"]
-        elif "result" in transcript_data and "text" in transcript_data["result"]:
-            # Nested format from WhisperService
-            transcript_text = transcript_data["result"]["text"]
-        else:
-            raise ValueError("No transcript text found in file")
-        
-        if not transcript_text or len(transcript_text.strip()) < 10:
-            raise ValueError("Transcript text is too short or empty")
+        if args.manifest:
+            # Results are emitted per transcript as they complete
+            asyncio.run(process_manifest(args.api_key, args.manifest, args.model))
+            return
         
-        # Process with AI
-        result = process_transcript(args.api_key, transcript_text, args.model)
+        if args.batch_id:
+            # Collect a batch submitted by an earlier --batch run
+            result = collect_batch(create_openai_client(args.api_key), args.batch_id)
+            if result is None:
+                return
+        else:
+            if not args.transcript_file:
+                raise ValueError("transcript_file is required unless --batch-id or --manifest is given")
+            
+            # Load transcript
+            emit_progress(5, "Loading transcript...")
+            transcript_text = load_transcript_text(args.transcript_file)
+            
+            if args.batch:
+                # Submit and let the parent process poll with --batch-id later
+                batch_id = submit_batch(
+                    create_openai_client(args.api_key),
+                    transcript_text,
+                    args.model,
+                    custom_id=Path(args.transcript_file).stem
+                )
+                emit_message("batch_submitted", batch_id=batch_id)
+                return
+            
+            # Process with AI
+            result = process_transcript(args.api_key, transcript_text, args.model)
         
         # Save to file if requested
         if args.output:
             emit_progress(98, "Saving AI results to file...")
-            with open(args.output, 'w', encoding='utf-8') as f:
-                json.dump(result, f, indent=2, ensure_ascii=False)
+            with open(args.output, 'wb') as f:
+                f.write(orjson.dumps(result, option=orjson.OPT_INDENT_2 | orjson.OPT_NON_STR_KEYS))
         
         # Send result
         emit_result(
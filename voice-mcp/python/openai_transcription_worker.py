@@ -20,36 +20,40 @@ import sys
 import json
 import os
 import argparse
+import asyncio
+import time
 import tempfile
 import shutil
-import traceback
+import subprocess
+import operator
+import logging
 from pathlib import Path
-from typing import Dict, Any, List, Optional
+from typing import Dict, Any, List, Optional, Tuple
 
-def log_debug(message: str):
-    """Log debug message to stderr for debugging"""
-    print(f"[DEBUG] {message}", file=sys.stderr, flush=True)
+# Diagnostics go to stderr; set VOICEMCP_LOG=DEBUG to enable them
+logging.basicConfig(stream=sys.stderr, format="[%(levelname)s] %(message)s")
+logger = logging.getLogger("transcribe")
+_log_level = logging.getLevelName(os.getenv("VOICEMCP_LOG", "WARNING").upper())
+logger.setLevel(_log_level if isinstance(_log_level, int) else logging.WARNING)  # Unknown names fall back
 
 # Log startup
-log_debug("OpenAI transcription worker starting...")
+logger.debug("OpenAI transcription worker starting...")
 
 try:
-    from openai import OpenAI
-    import openai
-    log_debug("OpenAI imports successful")
+    import orjson
 except ImportError as e:
-    log_debug(f"OpenAI import failed: {e}")
-    error_msg = {"type": "error", "error": "OpenAI package not installed"}
+    logger.debug(f"orjson import failed: {e}")
+    error_msg = {"type": "error", "error": "orjson package not installed. Install with: pip install orjson"}
     print(json.dumps(error_msg))
     sys.exit(1)
 
 try:
-    from pydub import AudioSegment
-    from pydub.utils import which
-    log_debug("PyDub imports successful")
+    from openai import AsyncOpenAI
+    import openai
+    logger.debug("OpenAI imports successful")
 except ImportError as e:
-    log_debug(f"PyDub import failed: {e}")
-    error_msg = {"type": "error", "error": "PyDub package not installed. Install with: pip install pydub"}
+    logger.debug(f"OpenAI import failed: {e}")
+    error_msg = {"type": "error", "error": "OpenAI package not installed"}
     print(json.dumps(error_msg))
     sys.exit(1)
 
@@ -57,180 +61,220 @@ except ImportError as e:
 COST_PER_MINUTE = 0.006  # $0.006 per minute as of 2025
 MAX_FILE_SIZE = 25 * 1024 * 1024  # 25MB limit
 TARGET_FILE_SIZE = 24 * 1024 * 1024  # 24MB target to stay safely under limit
+FALLBACK_BITRATE = 128 * 1000  # bits/s used when stream copy fails and we re-encode to MP3
+PROGRESS_TICK_INTERVAL = 0.5  # Seconds between liveness updates while waiting on OpenAI
+
+# Segment fields copied from OpenAI responses, with defaults for missing attributes
+SEGMENT_KEYS = ("id", "seek", "start", "end", "text", "tokens", "temperature",
+                "avg_logprob", "compression_ratio", "no_speech_prob")
+SEGMENT_DEFAULTS = (0, 0, 0.0, 0.0, "", [], 0.0, 0.0, 0.0, 0.0)
+_get_segment_fields = operator.attrgetter(*SEGMENT_KEYS)
+
+# ffmpeg muxer for each supported extension, used when stream-copying a truncated file
+FFMPEG_FORMATS = {
+    '.mp3': 'mp3',
+    '.mpeg': 'mp3',
+    '.mpga': 'mp3',
+    '.mp4': 'mp4',
+    '.m4a': 'ipod',
+    '.wav': 'wav',
+    '.webm': 'webm'
+}
+
+logger.debug(f"Constants loaded: MAX_FILE_SIZE={MAX_FILE_SIZE}, TARGET_FILE_SIZE={TARGET_FILE_SIZE}")
 
-log_debug(f"Constants loaded: MAX_FILE_SIZE={MAX_FILE_SIZE}, TARGET_FILE_SIZE={TARGET_FILE_SIZE}")
+# Messages are written as bytes straight to stdout's buffer, one write per message
+_write = sys.stdout.buffer.write
+_flush = sys.stdout.buffer.flush
+
+
+def emit_message(message_type: str, **kwargs) -> None:
+    """Write a JSON message line to stdout"""
+    message = {"type": message_type, **kwargs}
+    _write(orjson.dumps(message, option=orjson.OPT_APPEND_NEWLINE))
+    _flush()
 
 
 def emit_progress(progress: int, message: str = ""):
     """Emit progress update to stdout"""
-    output = {"type": "progress", "progress": progress, "message": message}
-    print(json.dumps(output), flush=True)
-    log_debug(f"Progress {progress}%: {message}")
+    emit_message("progress", progress=progress, message=message)
 
 
 def emit_result(text: str, language: str, segments: List[Dict]):
     """Emit successful transcription result"""
-    output = {
-        "type": "result",
-        "text": text,
-        "language": language,
-        "segments": segments
-    }
-    print(json.dumps(output), flush=True)
-    log_debug(f"Result emitted: {len(text)} chars, {len(segments)} segments, language: {language}")
+    emit_message("result", text=text, language=language, segments=segments)
+    logger.debug(f"Result emitted: {len(text)} chars, {len(segments)} segments, language: {language}")
 
 
 def emit_error(error: str, details: str = ""):
     """Emit error message"""
-    output = {"type": "error", "error": error, "details": details}
-    print(json.dumps(output), flush=True)
-    log_debug(f"Error emitted: {error} | Details: {details}")
+    emit_message("error", error=error, details=details)
+    logger.debug(f"Error emitted: {error} | Details: {details}")
 
 
-def get_file_size(filepath: str) -> int:
-    """Get file size in bytes"""
+def stat_file(filepath: str) -> os.stat_result:
+    """Stat the file once; callers read size (and mtime) from the result"""
     try:
-        size = os.path.getsize(filepath)
-        log_debug(f"File size: {size} bytes ({size / (1024*1024):.1f}MB)")
-        return size
+        st = os.stat(filepath)
+    except FileNotFoundError:
+        logger.debug(f"File not found: {filepath}")
+        raise ValueError(f"File not found: {filepath}")
     except OSError as e:
-        log_debug(f"Failed to get file size: {e}")
+        logger.debug(f"Failed to stat file: {e}")
         raise ValueError(f"Cannot access file: {e}")
+    
+    logger.debug(f"File size: {st.st_size} bytes ({st.st_size / (1024*1024):.1f}MB)")
+    return st
 
 
-def estimate_audio_duration(filepath: str) -> float:
-    """Estimate audio duration from file size"""
-    try:
-        file_size = get_file_size(filepath)
-        # Rough estimate: WebM/Opus at 128kbps ≈ 16KB/s
-        estimated_duration = file_size / (16 * 1024)
-        duration = max(1.0, estimated_duration)  # Minimum 1 second
-        log_debug(f"Estimated duration: {duration:.1f} seconds")
-        return duration
-    except Exception as e:
-        log_debug(f"Failed to estimate duration: {e}")
-        return 60.0  # Default to 1 minute if estimation fails
-
-
-def calculate_estimated_cost(filepath: str) -> float:
+def calculate_estimated_cost(duration_seconds: float) -> float:
     """Calculate estimated cost for transcription"""
-    duration_seconds = estimate_audio_duration(filepath)
     duration_minutes = duration_seconds / 60.0
     cost = duration_minutes * COST_PER_MINUTE
-    log_debug(f"Estimated cost: ${cost:.4f} ({duration_minutes:.1f} minutes)")
+    logger.debug(f"Estimated cost: ${cost:.4f} ({duration_minutes:.1f} minutes)")
     return cost
 
 
-def validate_file_basic(filepath: str) -> None:
-    """Basic file validation (existence and format)"""
-    log_debug(f"Validating file: {filepath}")
+def validate_file_basic(filepath: str) -> os.stat_result:
+    """Basic file validation (existence and format), returning the file's stat result"""
+    logger.debug(f"Validating file: {filepath}")
     
-    if not os.path.exists(filepath):
-        log_debug(f"File not found: {filepath}")
-        raise ValueError(f"File not found: {filepath}")
+    st = stat_file(filepath)
     
     # Check file extension (OpenAI supports these formats)
     supported_extensions = {'.mp3', '.mp4', '.mpeg', '.mpga', '.m4a', '.wav', '.webm'}
     file_ext = Path(filepath).suffix.lower()
-    log_debug(f"File extension: {file_ext}")
+    logger.debug(f"File extension: {file_ext}")
     
     if file_ext not in supported_extensions:
-        log_debug(f"Unsupported format: {file_ext}")
+        logger.debug(f"Unsupported format: {file_ext}")
         raise ValueError(f"Unsupported file format: {file_ext}. Supported: {', '.join(supported_extensions)}")
     
-    log_debug("File validation passed")
-
-
-def truncate_audio_file(filepath: str, target_size: int) -> str:
-    """Truncate audio file to target size and return path to truncated file"""
-    log_debug(f"Starting audio truncation: {filepath} -> {target_size} bytes")
-    emit_progress(15, "Loading audio file for truncation...")
-    
-    # Load the audio file
-    file_ext = Path(filepath).suffix.lower()
-    log_debug(f"Loading audio file with extension: {file_ext}")
-    
+    logger.debug("File validation passed")
+    return st
+
+
+def probe_duration(filepath: str) -> Optional[float]:
+    """Read the audio duration, from the container header or else from the last packet timestamp"""
+    logger.debug(f"Probing audio duration: {filepath}")
+    completed = subprocess.run(
+        ["ffprobe", "-v", "quiet", "-show_entries", "format=duration", "-of", "csv=p=0", filepath],
+        check=True,
+        capture_output=True
+    )
     try:
-        if file_ext == '.webm':
-            audio = AudioSegment.from_file(filepath, format="webm")
-        elif file_ext == '.mp3':
-            audio = AudioSegment.from_mp3(filepath)
-        elif file_ext == '.wav':
-            audio = AudioSegment.from_wav(filepath)
-        elif file_ext == '.m4a':
-            audio = AudioSegment.from_file(filepath, format="m4a")
-        else:
-            audio = AudioSegment.from_file(filepath)
-        
-        log_debug(f"Audio loaded successfully: {len(audio)}ms duration")
-    except Exception as e:
-        log_debug(f"Failed to load audio: {e}")
-        log_debug(f"Traceback: {traceback.format_exc()}")
-        raise
-    
-    emit_progress(25, "Calculating truncation point...")
+        duration = float(completed.stdout)
+    except ValueError:
+        # MediaRecorder WebM files carry no duration in the header; demux the packets instead
+        logger.debug("No container duration, reading packet timestamps")
+        completed = subprocess.run(
+            ["ffprobe", "-v", "quiet", "-select_streams", "a:0", "-show_entries", "packet=pts_time,duration_time",
+             "-of", "csv=p=0", filepath],
+            check=True,
+            capture_output=True
+        )
+        packets = completed.stdout.split()
+        if not packets:
+            return None
+        pts_time, _, duration_time = packets[-1].decode().partition(",")
+        try:
+            duration = float(pts_time) + float(duration_time or 0)
+        except ValueError:
+            return None
     
-    # Calculate how much audio to keep based on target file size
-    original_size = get_file_size(filepath)
-    size_ratio = target_size / original_size
-    log_debug(f"Size ratio: {size_ratio:.3f} (target: {target_size}, original: {original_size})")
+    logger.debug(f"Probe result: {duration:.1f}s")
+    return duration
+
+
+def truncate_audio_file(filepath: str, target_size: int) -> Tuple[str, Optional[float]]:
+    """Truncate audio file to target size and return the truncated file path and duration"""
+    logger.debug(f"Starting audio truncation: {filepath} -> {target_size} bytes")
     
-    # Truncate audio to the calculated duration
-    original_duration = len(audio)
-    target_duration = int(original_duration * size_ratio)
-    log_debug(f"Duration: {original_duration}ms -> {target_duration}ms")
+    if not shutil.which("ffmpeg"):
+        raise ValueError("ffmpeg is required to truncate large audio files")
     
-    emit_progress(35, f"Truncating to {target_duration/1000:.1f} seconds...")
-    truncated_audio = audio[:target_duration]
-    log_debug(f"Audio truncated to {len(truncated_audio)}ms")
+    file_ext = Path(filepath).suffix.lower()
     
-    # Save truncated audio to temporary file
-    temp_file = tempfile.NamedTemporaryFile(delete=False, suffix='.mp3')
+    # Save truncated audio to temporary file, keeping the container so it can be stream-copied
+    temp_file = tempfile.NamedTemporaryFile(delete=False, suffix=file_ext)
     temp_path = temp_file.name
     temp_file.close()
-    log_debug(f"Created temp file: {temp_path}")
+    logger.debug(f"Created temp file: {temp_path}")
     
-    emit_progress(45, "Saving truncated file...")
+    # Cut by output size (-fs) so files without a header duration can be truncated too; only
+    # the audio streams are kept so a video track doesn't use up the size budget
+    emit_progress(35, f"Truncating to {target_size/(1024*1024):.0f}MB...")
     try:
-        truncated_audio.export(temp_path, format="mp3", bitrate="128k")
-        log_debug("Audio export completed")
-    except Exception as e:
-        log_debug(f"Failed to export audio: {e}")
-        log_debug(f"Traceback: {traceback.format_exc()}")
-        raise
+        subprocess.run(
+            ["ffmpeg", "-y", "-i", filepath, "-map", "0:a", "-c", "copy", "-fs", str(target_size),
+             "-f", FFMPEG_FORMATS.get(file_ext, file_ext.lstrip('.')), temp_path],
+            check=True,
+            stdout=subprocess.DEVNULL,
+            stderr=subprocess.DEVNULL
+        )
+        logger.debug("Stream copy completed")
+    except subprocess.CalledProcessError as e:
+        logger.debug(f"Stream copy failed ({e}), re-encoding to MP3")
+        os.unlink(temp_path)
+        
+        temp_file = tempfile.NamedTemporaryFile(delete=False, suffix='.mp3')
+        temp_path = temp_file.name
+        temp_file.close()
+        
+        emit_progress(45, "Re-encoding truncated file...")
+        try:
+            subprocess.run(
+                ["ffmpeg", "-y", "-i", filepath, "-fs", str(target_size),
+                 "-vn", "-codec:a", "libmp3lame", "-b:a", str(FALLBACK_BITRATE), temp_path],
+                check=True,
+                stdout=subprocess.DEVNULL,
+                stderr=subprocess.DEVNULL
+            )
+            logger.debug("Audio re-encode completed")
+        except Exception as e:
+            logger.debug(f"Failed to re-encode audio: {e}")
+            logger.debug("Traceback:", exc_info=True)
+            os.unlink(temp_path)
+            raise
     
     # Verify the truncated file size
-    truncated_size = get_file_size(temp_path)
+    truncated_size = stat_file(temp_path).st_size
     emit_progress(50, f"Truncated file size: {truncated_size/(1024*1024):.1f}MB")
-    log_debug(f"Truncation completed: {temp_path} ({truncated_size} bytes)")
+    logger.debug(f"Truncation completed: {temp_path} ({truncated_size} bytes)")
+    
+    try:
+        duration_seconds = probe_duration(temp_path)
+    except Exception as e:
+        logger.debug(f"Failed to probe truncated duration: {e}")
+        duration_seconds = None
     
-    return temp_path
+    return temp_path, duration_seconds
 
 
-def create_openai_client(api_key: Optional[str] = None) -> OpenAI:
+def create_openai_client(api_key: Optional[str] = None) -> AsyncOpenAI:
     """Create OpenAI client with API key"""
-    log_debug("Creating OpenAI client...")
+    logger.debug("Creating OpenAI client...")
     
     # Try to get API key from parameter, environment, or fail
     if not api_key:
         api_key = os.getenv('OPENAI_API_KEY')
-        log_debug("Using API key from environment")
+        logger.debug("Using API key from environment")
     else:
-        log_debug("Using API key from parameter")
+        logger.debug("Using API key from parameter")
     
     if not api_key:
-        log_debug("No OpenAI API key found")
+        logger.debug("No OpenAI API key found")
         raise ValueError("OpenAI API key not provided. Set OPENAI_API_KEY environment variable or pass --api-key")
     
     # Don't log the full API key for security
-    log_debug(f"API key found: {api_key[:10]}...")
+    logger.debug(f"API key found: {api_key[:10]}...")
     
     try:
-        client = OpenAI(api_key=api_key)
-        log_debug("OpenAI client created successfully")
+        client = AsyncOpenAI(api_key=api_key)
+        logger.debug("OpenAI client created successfully")
         return client
     except Exception as e:
-        log_debug(f"Failed to create OpenAI client: {e}")
+        logger.debug(f"Failed to create OpenAI client: {e}")
         raise
 
 
@@ -240,49 +284,46 @@ def convert_segments_format(openai_segments: List[Any]) -> List[Dict]:
     OpenAI returns TranscriptionSegment objects (Pydantic models), not dicts,
     so we need to access attributes directly instead of using .get()
     """
-    log_debug(f"Converting {len(openai_segments)} segments")
+    logger.debug(f"Converting {len(openai_segments)} segments")
     
-    segments = []
-    for segment in openai_segments:
-        try:
-            converted = {
-                "id": getattr(segment, "id", 0),
-                "seek": getattr(segment, "seek", 0),
-                "start": getattr(segment, "start", 0.0),
-                "end": getattr(segment, "end", 0.0),
-                "text": getattr(segment, "text", ""),
-                "tokens": getattr(segment, "tokens", []),
-                "temperature": getattr(segment, "temperature", 0.0),
-                "avg_logprob": getattr(segment, "avg_logprob", 0.0),
-                "compression_ratio": getattr(segment, "compression_ratio", 0.0),
-                "no_speech_prob": getattr(segment, "no_speech_prob", 0.0)
-            }
-            segments.append(converted)
-            log_debug(f"Converted segment {converted['id']}: {converted['start']:.1f}s-{converted['end']:.1f}s")
-        except Exception as e:
-            log_debug(f"Failed to convert segment: {e}")
-            # Skip problematic segments rather than failing completely
-            continue
+    try:
+        segments = [dict(zip(SEGMENT_KEYS, _get_segment_fields(segment))) for segment in openai_segments]
+    except AttributeError as e:
+        logger.debug(f"Segment missing fields ({e}), falling back to defaults")
+        segments = [
+            {key: getattr(segment, key, default) for key, default in zip(SEGMENT_KEYS, SEGMENT_DEFAULTS)}
+            for segment in openai_segments
+        ]
     
-    log_debug(f"Converted {len(segments)} segments successfully")
+    logger.debug(f"Converted {len(segments)} segments successfully")
     return segments
 
 
-def transcribe_with_openai(
+async def report_wait_progress(start_progress: int, end_progress: int, message: str):
+    """Emit elapsed-time progress updates until cancelled"""
+    start_time = time.monotonic()
+    while True:
+        await asyncio.sleep(PROGRESS_TICK_INTERVAL)
+        elapsed = time.monotonic() - start_time
+        progress = min(end_progress, start_progress + int(elapsed // 2))
+        emit_progress(progress, f"{message} ({elapsed:.0f}s elapsed)")
+
+
+async def transcribe_with_openai(
     filepath: str,
-    client: OpenAI,
+    client: AsyncOpenAI,
     model: str = "whisper-1",
     language: Optional[str] = None
 ) -> Dict[str, Any]:
     """Transcribe audio file using OpenAI API, truncating if necessary"""
     
-    log_debug(f"Starting transcription: {filepath}")
+    logger.debug(f"Starting transcription: {filepath}")
     
     emit_progress(5, "Validating file...")
-    validate_file_basic(filepath)
+    file_stat = validate_file_basic(filepath)
     
     emit_progress(10, "Checking file size...")
-    file_size = get_file_size(filepath)
+    file_size = file_stat.st_size
     
     # Determine which file to use for transcription
     transcription_file = filepath
@@ -291,34 +332,43 @@ def transcribe_with_openai(
     if file_size > MAX_FILE_SIZE:
         size_mb = file_size / (1024 * 1024)
         emit_progress(12, f"File too large ({size_mb:.1f}MB), truncating to 24MB...")
-        log_debug(f"File too large ({size_mb:.1f}MB), starting truncation")
+        logger.debug(f"File too large ({size_mb:.1f}MB), starting truncation")
         
         try:
-            transcription_file = truncate_audio_file(filepath, TARGET_FILE_SIZE)
+            transcription_file, duration_seconds = truncate_audio_file(filepath, TARGET_FILE_SIZE)
             temp_file_to_cleanup = transcription_file
-            log_debug(f"Truncation completed: {transcription_file}")
+            logger.debug(f"Truncation completed: {transcription_file}")
         except Exception as e:
-            log_debug(f"Truncation failed: {e}")
+            logger.debug(f"Truncation failed: {e}")
             raise ValueError(f"Failed to truncate audio file: {e}")
     else:
         emit_progress(15, "File size OK, processing normally...")
-        log_debug("File size within limits, proceeding normally")
+        logger.debug("File size within limits, proceeding normally")
+        
+        try:
+            duration_seconds = probe_duration(filepath)
+        except Exception as e:
+            logger.debug(f"Failed to probe duration: {e}")
+            duration_seconds = None
     
     try:
         # Calculate estimated cost
         emit_progress(55, "Calculating estimated cost...")
-        estimated_cost = calculate_estimated_cost(transcription_file)
-        emit_progress(60, f"Estimated cost: ${estimated_cost:.4f}")
+        if duration_seconds is not None:
+            estimated_cost = calculate_estimated_cost(duration_seconds)
+            emit_progress(60, f"Estimated cost: ${estimated_cost:.4f}")
+        else:
+            emit_progress(60, "Estimated cost unavailable")
         
         emit_progress(65, "Uploading file to OpenAI...")
-        log_debug(f"Opening file for OpenAI: {transcription_file}")
+        logger.debug(f"Opening file for OpenAI: {transcription_file}")
         
         with open(transcription_file, "rb") as audio_file:
-            log_debug("File opened successfully")
+            logger.debug("File opened successfully")
             
-            # Create transcription request
+            # Create transcription request; a (name, file) tuple lets httpx stream the multipart body
             transcription_args = {
-                "file": audio_file,
+                "file": (Path(transcription_file).name, audio_file),
                 "model": model,
                 "response_format": "verbose_json",  # Get detailed response with segments
                 "temperature": 0  # Deterministic output
@@ -327,38 +377,41 @@ def transcribe_with_openai(
             # Add language if specified
             if language:
                 transcription_args["language"] = language
-                log_debug(f"Using language: {language}")
+                logger.debug(f"Using language: {language}")
             
             emit_progress(75, "Processing transcription...")
-            log_debug(f"Making OpenAI API call with model: {model}")
+            logger.debug(f"Making OpenAI API call with model: {model}")
             
-            # Make API call
+            # Make API call, reporting liveness while we wait for the response
+            ticker = asyncio.create_task(report_wait_progress(75, 89, "Processing transcription..."))
             try:
-                transcript = client.audio.transcriptions.create(**transcription_args)
-                log_debug("OpenAI API call completed successfully")
+                transcript = await client.audio.transcriptions.create(**transcription_args)
+                logger.debug("OpenAI API call completed successfully")
             except Exception as e:
-                log_debug(f"OpenAI API call failed: {e}")
-                log_debug(f"Traceback: {traceback.format_exc()}")
+                logger.debug(f"OpenAI API call failed: {e}")
+                logger.debug("Traceback:", exc_info=True)
                 raise
+            finally:
+                ticker.cancel()
             
             emit_progress(90, "Processing response...")
             
             # Extract data from response
             text = transcript.text
             detected_language = getattr(transcript, 'language', language or 'unknown')
-            log_debug(f"Transcription result: {len(text)} chars, language: {detected_language}")
+            logger.debug(f"Transcription result: {len(text)} chars, language: {detected_language}")
             
             # Convert segments if available
             segments = []
             if hasattr(transcript, 'segments') and transcript.segments:
-                log_debug(f"Found {len(transcript.segments)} segments in response")
+                logger.debug(f"Found {len(transcript.segments)} segments in response")
                 segments = convert_segments_format(transcript.segments)
-                log_debug(f"Extracted {len(segments)} segments")
+                logger.debug(f"Extracted {len(segments)} segments")
             else:
-                log_debug("No segments in response")
+                logger.debug("No segments in response")
             
             emit_progress(100, "Transcription completed")
-            log_debug("Transcription completed successfully")
+            logger.debug("Transcription completed successfully")
             
             return {
                 "text": text,
@@ -367,49 +420,49 @@ def transcribe_with_openai(
             }
             
     except openai.AuthenticationError as e:
-        log_debug(f"OpenAI authentication error: {e}")
+        logger.debug(f"OpenAI authentication error: {e}")
         raise ValueError(f"Authentication failed: {e}")
     except openai.RateLimitError as e:
-        log_debug(f"OpenAI rate limit error: {e}")
+        logger.debug(f"OpenAI rate limit error: {e}")
         raise ValueError(f"Rate limit exceeded: {e}")
     except openai.BadRequestError as e:
-        log_debug(f"OpenAI bad request error: {e}")
+        logger.debug(f"OpenAI bad request error: {e}")
         raise ValueError(f"Bad request: {e}")
     except openai.APIError as e:
-        log_debug(f"OpenAI API error: {e}")
+        logger.debug(f"OpenAI API error: {e}")
         raise ValueError(f"OpenAI API error: {e}")
     except Exception as e:
-        log_debug(f"Unexpected error in transcription: {e}")
-        log_debug(f"Traceback: {traceback.format_exc()}")
+        logger.debug(f"Unexpected error in transcription: {e}")
+        logger.debug("Traceback:", exc_info=True)
         raise ValueError(f"Transcription failed: {e}")
     
     finally:
         # Clean up temporary file if we created one
         if temp_file_to_cleanup and os.path.exists(temp_file_to_cleanup):
             try:
-                log_debug(f"Cleaning up temp file: {temp_file_to_cleanup}")
+                logger.debug(f"Cleaning up temp file: {temp_file_to_cleanup}")
                 os.unlink(temp_file_to_cleanup)
-                log_debug("Temp file cleaned up successfully")
+                logger.debug("Temp file cleaned up successfully")
             except Exception as e:
-                log_debug(f"Failed to clean up temp file: {e}")
+                logger.debug(f"Failed to clean up temp file: {e}")
 
 
 def save_output(result: Dict[str, Any], output_path: Optional[str]) -> None:
     """Save transcription result to file if output path specified"""
     if output_path:
         try:
-            log_debug(f"Saving output to: {output_path}")
-            with open(output_path, 'w', encoding='utf-8') as f:
-                json.dump(result, f, indent=2, ensure_ascii=False)
-            log_debug("Output saved successfully")
+            logger.debug(f"Saving output to: {output_path}")
+            with open(output_path, 'wb') as f:
+                f.write(orjson.dumps(result, option=orjson.OPT_INDENT_2 | orjson.OPT_NON_STR_KEYS))
+            logger.debug("Output saved successfully")
         except Exception as e:
-            log_debug(f"Failed to save output: {e}")
+            logger.debug(f"Failed to save output: {e}")
             emit_error(f"Failed to save output file: {e}")
 
 
 def main():
     """Main transcription worker function"""
-    log_debug("Main function starting")
+    logger.debug("Main function starting")
     
     parser = argparse.ArgumentParser(description='OpenAI Transcription Worker with File Truncation')
     parser.add_argument('audio_file', help='Path to audio file to transcribe')
@@ -420,9 +473,9 @@ def main():
     
     try:
         args = parser.parse_args()
-        log_debug(f"Arguments parsed: audio_file={args.audio_file}, model={args.model}, language={args.language}")
+        logger.debug(f"Arguments parsed: audio_file={args.audio_file}, model={args.model}, language={args.language}")
     except Exception as e:
-        log_debug(f"Failed to parse arguments: {e}")
+        logger.debug(f"Failed to parse arguments: {e}")
         raise
     
     try:
@@ -433,38 +486,38 @@ def main():
         client = create_openai_client(args.api_key)
         
         # Perform transcription (with truncation if needed)
-        log_debug("Starting transcription process")
-        result = transcribe_with_openai(
+        logger.debug("Starting transcription process")
+        result = asyncio.run(transcribe_with_openai(
             args.audio_file,
             client,
             model=args.model,
             language=args.language
-        )
+        ))
         
         # Save output file if requested
         if args.output:
             save_output(result, args.output)
         
         # Emit final result
-        log_debug("Emitting final result")
+        logger.debug("Emitting final result")
         emit_result(result["text"], result["language"], result["segments"])
-        log_debug("OpenAI transcription worker completed successfully")
+        logger.debug("OpenAI transcription worker completed successfully")
         
     except ValueError as e:
-        log_debug(f"ValueError in main: {e}")
+        logger.debug(f"ValueError in main: {e}")
         emit_error(str(e))
         sys.exit(1)
     except KeyboardInterrupt:
-        log_debug("Transcription cancelled by user")
+        logger.debug("Transcription cancelled by user")
         emit_error("Transcription cancelled by user")
         sys.exit(1)
     except Exception as e:
-        log_debug(f"Unexpected error in main: {e}")
-        log_debug(f"Traceback: {traceback.format_exc()}")
+        logger.debug(f"Unexpected error in main: {e}")
+        logger.debug("Traceback:", exc_info=True)
         emit_error(f"Unexpected error: {e}", str(type(e).__name__))
         sys.exit(1)
 
 
 if __name__ == "__main__":
-    log_debug("Script starting as main module")
+    logger.debug("Script starting as main module")
     main()
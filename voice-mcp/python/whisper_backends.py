@@ -0,0 +1,77 @@
+"""
+Backend, precision and quantization helpers shared by the local Whisper workers.
+"""
+
+import importlib.util
+from typing import Any
+
+import torch
+
+# CTranslate2 compute types for explicit --precision values
+FASTER_WHISPER_COMPUTE_TYPES = {
+    "fp32": "float32",
+    "fp16": "float16",
+    "bf16": "bfloat16"
+}
+
+
+def load_faster_whisper_model(model_name: str, device: str, precision: str = "auto") -> Any:
+    """Load a CTranslate2 (faster-whisper) model, with INT8 weights unless a precision is given."""
+    try:
+        from faster_whisper import WhisperModel
+    except ImportError as e:
+        raise RuntimeError(f"faster-whisper backend requested but not installed: {e}")
+    
+    if precision == "auto":
+        compute_type = "int8_float16" if device == "cuda" else "int8"
+    else:
+        compute_type = FASTER_WHISPER_COMPUTE_TYPES[precision]
+    return WhisperModel(model_name, device=device, compute_type=compute_type)
+
+
+def cpu_supports_bf16() -> bool:
+    """Check whether this CPU has native BF16 matmul support (AVX-512 BF16)."""
+    is_supported = getattr(torch.cpu, "_is_avx512_bf16_supported", None)
+    return bool(is_supported and is_supported())
+
+
+def resolve_precision(device: str, precision: str = "auto") -> str:
+    """Resolve "auto" to fp16 on CUDA, bf16 on CPUs with native BF16, otherwise fp32."""
+    if precision != "auto":
+        return precision
+    
+    if device == "cuda":
+        return "fp16"
+    return "bf16" if cpu_supports_bf16() else "fp32"
+
+
+class BF16AudioEncoder(torch.nn.Module):
+    """Run Whisper's audio encoder under BF16 autocast, returning FP32 features for the decoder."""
+    
+    def __init__(self, encoder: torch.nn.Module):
+        super().__init__()
+        self.encoder = encoder
+    
+    def forward(self, mel: torch.Tensor) -> torch.Tensor:
+        with torch.autocast(device_type=mel.device.type, dtype=torch.bfloat16):
+            # whisper.decode rejects audio features that are not FP32 when fp16=False
+            return self.encoder(mel).float()
+
+
+def quantize_whisper_model(model: Any) -> Any:
+    """Apply dynamic INT8 quantization to the Linear layers of a CPU openai-whisper model."""
+    # Whisper's Linear subclass only adds a dtype cast, but quantize_dynamic matches exact nn.Linear types
+    for module in model.modules():
+        if isinstance(module, torch.nn.Linear):
+            module.__class__ = torch.nn.Linear
+    return torch.ao.quantization.quantize_dynamic(model, {torch.nn.Linear}, dtype=torch.qint8, inplace=True)
+
+
+def resolve_backend(backend: str) -> str:
+    """Resolve "auto" to a concrete backend, preferring CTranslate2's fused CUDA kernels on a GPU."""
+    if backend != "auto":
+        return backend
+    
+    if torch.cuda.is_available() and importlib.util.find_spec("faster_whisper") is not None:
+        return "faster"
+    return "openai"
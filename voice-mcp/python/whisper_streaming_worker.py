@@ -11,16 +11,38 @@ import traceback
 import os
 import warnings
 import time
+import functools
+import types
+import queue
+import socketserver
+import threading
+from concurrent.futures import Future, ThreadPoolExecutor
 from pathlib import Path
-from typing import Dict, Any, Optional
+from typing import Dict, Any, Optional, Union
 
 # Suppress warnings
 warnings.filterwarnings("ignore")
 os.environ["PYTHONWARNINGS"] = "ignore"
 
+# Reuse compiled Inductor graphs across warm worker restarts
+os.environ.setdefault("TORCHINDUCTOR_FX_GRAPH_CACHE", "1")
+
+# Limit allocator fragmentation in long-running warm workers; must be set before torch initialises CUDA
+os.environ.setdefault("PYTORCH_CUDA_ALLOC_CONF", "expandable_segments:True,max_split_size_mb:128")
+
 try:
+    import orjson
+    import numpy as np
     import whisper
     import torch
+    import torch.nn.functional as F
+    from whisper_backends import (
+        BF16AudioEncoder,
+        load_faster_whisper_model,
+        quantize_whisper_model,
+        resolve_backend,
+        resolve_precision
+    )
 except ImportError as e:
     print(json.dumps({
         "type": "error",
@@ -28,9 +50,61 @@ except ImportError as e:
     }), flush=True)
     sys.exit(1)
 
-# Global model instance for persistent loading
-LOADED_MODEL = None
-LOADED_MODEL_NAME = None
+# Length of the silent clip used to warm up kernels before serving chunks
+WARMUP_AUDIO_SECONDS = 30
+SAMPLE_RATE = 16000
+
+# Chunks of up to 30 s are encoded together in batch mode
+ENCODER_BATCH_SIZE = 8
+
+# Decoded chunks allowed to wait for the model in batch mode; keeps the next batch ready without holding every chunk in memory
+DECODE_QUEUE_SIZE = ENCODER_BATCH_SIZE
+
+# model.transcribe's thresholds for treating a window as silence
+NO_SPEECH_THRESHOLD = 0.6
+LOGPROB_THRESHOLD = -1.0
+
+# Fast transcription options for real-time processing of chunks longer than one window
+FAST_TRANSCRIBE_OPTIONS = types.MappingProxyType({
+    "verbose": False,  # Keep quiet
+    "word_timestamps": False,  # Disable for speed
+    "temperature": 0.0,  # Deterministic results
+    "beam_size": 1,  # Faster beam search
+    "best_of": 1,  # Single best result
+    "patience": 1.0,  # Standard patience
+    "length_penalty": 1.0,  # Standard length penalty
+    "suppress_tokens": "-1",  # Default suppression
+    "initial_prompt": None,  # No prompt for generic transcription
+    "condition_on_previous_text": False,  # Independent chunk processing
+    "compression_ratio_threshold": 2.4,  # Default threshold
+    "logprob_threshold": LOGPROB_THRESHOLD,
+    "no_speech_threshold": NO_SPEECH_THRESHOLD
+})
+
+# Loaded models kept in memory for reuse, keyed by their load settings
+DEFAULT_MAX_CACHED_MODELS = 4
+_MODEL_CACHE_LOCK = threading.Lock()
+
+# Replay greedy decoder steps from a captured CUDA graph (--cuda-graphs)
+CUDA_GRAPHS_ENABLED = False
+
+# Share of GPU memory a warm worker may claim, and idle cached memory it keeps before releasing it
+CUDA_MEMORY_FRACTION = 0.8
+CUDA_CACHE_SLACK_BYTES = 512 << 20
+
+# Pinned host buffers for audio copies to the GPU, created on first CUDA use
+_AUDIO_STAGER = None
+
+# Headerless 16-bit little-endian mono PCM chunks are read directly instead of through ffmpeg (--pcm-sample-rate)
+PCM_EXTENSIONS = (".pcm", ".raw")
+PCM_SAMPLE_RATE = SAMPLE_RATE
+
+# Messages are written as bytes straight to stdout's buffer, one write per message;
+# the lock keeps background progress threads from interleaving with the main thread
+_write = sys.stdout.buffer.write
+_flush = sys.stdout.buffer.flush
+_EMIT_LOCK = threading.Lock()
+_LAST_PROGRESS = None
 
 def emit_message(message_type: str, **kwargs) -> None:
     """Send a JSON message to the parent process via stdout."""
@@ -38,11 +112,20 @@ def emit_message(message_type: str, **kwargs) -> None:
         "type": message_type,
         **kwargs
     }
-    print(json.dumps(message), flush=True)
+    data = orjson.dumps(message, option=orjson.OPT_APPEND_NEWLINE)
+    with _EMIT_LOCK:
+        _write(data)
+        _flush()
 
 
 def emit_progress(progress: int, message: str = "") -> None:
     """Send progress update to parent process."""
+    global _LAST_PROGRESS
+    
+    # Repeated values don't move the progress bar
+    if progress == _LAST_PROGRESS:
+        return
+    _LAST_PROGRESS = progress
     emit_message("progress", progress=progress, message=message)
 
 
@@ -60,142 +143,528 @@ def emit_result(text: str, language: str, segments: list, confidence: float = No
                 confidence=confidence)
 
 
-def load_model_if_needed(model_name: str = "tiny") -> whisper.Whisper:
+def select_device(model_name: str, backend: str = "openai", quantize: str = "none") -> str:
+    """Pick the device a model should be loaded on."""
+    # Dynamically quantized kernels only run on the CPU
+    if backend == "openai" and quantize == "int8":
+        return "cpu"
+    
+    # Prefer CPU for real-time processing (more consistent). Only use GPU for small PyTorch
+    # models to avoid memory issues; CTranslate2's INT8 weights fit every model size
+    if torch.cuda.is_available() and (backend == "faster" or model_name in ["tiny", "base"]):
+        return "cuda"
+    return "cpu"
+
+
+def load_model(model_name: str, backend: str, device: str, precision: str, quantize: str) -> Any:
+    """Load a Whisper model with the given settings."""
+    emit_progress(10, f"Loading Whisper model: {model_name}")
+    
+    if backend == "faster":
+        model = load_faster_whisper_model(model_name, device, precision)
+    else:
+        model = whisper.load_model(model_name, device=device)
+        if quantize == "int8":
+            model = quantize_whisper_model(model)
+        elif resolve_precision(device, precision) == "bf16":
+            model.encoder = BF16AudioEncoder(model.encoder)
+    
+    emit_progress(20, f"Model {model_name} loaded on {device} ({backend} backend)")
+    return model
+
+
+_get_cached_model = functools.lru_cache(maxsize=DEFAULT_MAX_CACHED_MODELS)(load_model)
+
+
+def enable_cuda_graphs() -> None:
+    """Decode through captured CUDA graphs instead of launching every decoder kernel per token."""
+    global CUDA_GRAPHS_ENABLED
+    CUDA_GRAPHS_ENABLED = True
+
+
+def set_pcm_sample_rate(sample_rate: int) -> None:
+    """Set the sample rate raw PCM chunk files are recorded at."""
+    global PCM_SAMPLE_RATE
+    PCM_SAMPLE_RATE = sample_rate
+
+
+def set_max_cached_models(max_models: int) -> None:
+    """Resize the model cache, dropping any models already loaded."""
+    global _get_cached_model
+    with _MODEL_CACHE_LOCK:
+        _get_cached_model = functools.lru_cache(maxsize=max_models)(load_model)
+
+
+def load_model_if_needed(model_name: str = "tiny", backend: str = "openai", precision: str = "auto",
+                         quantize: str = "none", report_errors: bool = True) -> Any:
     """Load the Whisper model if not already loaded or if different model requested."""
-    global LOADED_MODEL, LOADED_MODEL_NAME
+    device = select_device(model_name, backend, quantize)
     
-    if LOADED_MODEL is None or LOADED_MODEL_NAME != model_name:
+    # Held across the load so concurrent requests can't load the same model twice
+    with _MODEL_CACHE_LOCK:
+        hits = _get_cached_model.cache_info().hits
         try:
-            emit_progress(10, f"Loading Whisper model: {model_name}")
-            
-            # Prefer CPU for real-time processing (more consistent)
-            device = "cpu"
-            if torch.cuda.is_available() and model_name in ["tiny", "base"]:
-                # Only use GPU for small models to avoid memory issues
-                device = "cuda"
-            
-            LOADED_MODEL = whisper.load_model(model_name, device=device)
-            LOADED_MODEL_NAME = model_name
-            
-            emit_progress(20, f"Model {model_name} loaded on {device}")
-            
+            model = _get_cached_model(model_name, backend, device, precision, quantize)
         except Exception as e:
-            emit_error(f"Failed to load model: {str(e)}", traceback.format_exc())
+            if report_errors:
+                emit_error(f"Failed to load model: {str(e)}", traceback.format_exc())
             raise
+        if _get_cached_model.cache_info().hits > hits:
+            emit_message("model_cache_hit", model=model_name, backend=backend, device=device)
     
-    return LOADED_MODEL
+    return model
 
 
-def calculate_confidence(result: Dict[str, Any]) -> float:
-    """Calculate average confidence from segments."""
-    if "segments" not in result or not result["segments"]:
+def calculate_confidence(avg_logprobs: list) -> float:
+    """Calculate average confidence from segment log probabilities."""
+    if not avg_logprobs:
         return 0.0
     
-    total_confidence = 0.0
-    segment_count = 0
+    # Convert log probabilities to confidence (0-1)
+    return float(np.clip(np.asarray(avg_logprobs, dtype=np.float64) + 1.0, 0.0, 1.0).mean())
+
+
+def transcribe_with_faster_whisper(model: Any, audio: Union[str, np.ndarray], language: str = None) -> Dict[str, Any]:
+    """Transcribe with faster-whisper, returning a result shaped like openai-whisper's."""
+    segments_iter, info = model.transcribe(
+        audio,
+        language=language,
+        beam_size=1,
+        temperature=0.0,
+        condition_on_previous_text=False,
+        vad_filter=False
+    )
     
-    for segment in result["segments"]:
-        if "avg_logprob" in segment:
-            # Convert log probability to confidence (0-1)
-            confidence = min(1.0, max(0.0, (segment["avg_logprob"] + 1.0)))
-            total_confidence += confidence
-            segment_count += 1
+    segments = [
+        {
+            "start": segment.start,
+            "end": segment.end,
+            "text": segment.text,
+            "avg_logprob": segment.avg_logprob
+        }
+        for segment in segments_iter
+    ]
+    
+    return {
+        "text": "".join(segment["text"] for segment in segments),
+        "language": info.language,
+        "segments": segments
+    }
+
+
+def load_audio(audio_path: str) -> np.ndarray:
+    """Decode an audio file once into 16 kHz mono float32 PCM."""
+    if not Path(audio_path).exists():
+        raise FileNotFoundError(f"Audio file not found: {audio_path}")
+    
+    if Path(audio_path).suffix.lower() in PCM_EXTENSIONS:
+        return load_pcm_audio(audio_path)
+    return whisper.load_audio(audio_path, sr=SAMPLE_RATE)
+
+
+def load_pcm_audio(audio_path: str) -> np.ndarray:
+    """Read a raw 16-bit PCM chunk through a memory map, resampling to 16 kHz if needed."""
+    samples = np.memmap(audio_path, dtype="<i2", mode="r")
+    audio = samples.astype(np.float32) / 32768.0
+    
+    if PCM_SAMPLE_RATE != SAMPLE_RATE:
+        try:
+            from scipy.signal import resample_poly
+        except ImportError as e:
+            raise RuntimeError(f"Resampling {PCM_SAMPLE_RATE} Hz PCM requires scipy: {e}")
+        audio = resample_poly(audio, SAMPLE_RATE, PCM_SAMPLE_RATE).astype(np.float32)
+    
+    return audio
+
+
+class PinnedAudioStager:
+    """Stage audio windows through alternating pinned host buffers for asynchronous copies to the GPU."""
+    
+    def __init__(self, num_buffers: int = 2):
+        self.buffers = [torch.empty(whisper.audio.N_SAMPLES, dtype=torch.float32, pin_memory=True)
+                        for _ in range(num_buffers)]
+        self.copy_done = [None] * num_buffers
+        self.next_buffer = 0
+    
+    def to_device(self, audio: np.ndarray, device: torch.device) -> torch.Tensor:
+        i = self.next_buffer
+        self.next_buffer = (i + 1) % len(self.buffers)
+        
+        # Only reuse a buffer once the copy that last read from it has finished
+        if self.copy_done[i] is not None:
+            self.copy_done[i].synchronize()
+        
+        staged = self.buffers[i][:len(audio)]
+        staged.copy_(torch.from_numpy(audio))
+        audio_gpu = staged.to(device, non_blocking=True)
+        
+        self.copy_done[i] = torch.cuda.Event()
+        self.copy_done[i].record()
+        return audio_gpu
+
+
+def stage_audio(audio: np.ndarray, device: torch.device) -> torch.Tensor:
+    """Copy a window of up to 30 s to the GPU without blocking on the transfer."""
+    global _AUDIO_STAGER
+    if _AUDIO_STAGER is None:
+        _AUDIO_STAGER = PinnedAudioStager()
+    return _AUDIO_STAGER.to_device(audio, device)
+
+
+def log_mel_window(model: Any, audio: np.ndarray) -> torch.Tensor:
+    """Log-mel spectrogram of a chunk of up to 30 s, padded in the log-mel domain exactly like model.transcribe."""
+    if model.device.type == "cuda":
+        # Compute the spectrogram on the GPU from an asynchronously copied waveform
+        audio = stage_audio(audio, model.device)
+    
+    mel = whisper.log_mel_spectrogram(audio, model.dims.n_mels, padding=whisper.audio.N_SAMPLES)
+    return whisper.pad_or_trim(mel[:, :-whisper.audio.N_FRAMES], whisper.audio.N_FRAMES)
+
+
+class CUDAGraphInference(whisper.decoding.Inference):
+    """Greedy decoder steps over a static KV cache, captured once as a CUDA graph and replayed per token."""
+    
+    def __init__(self, model: Any, dtype: torch.dtype):
+        dims = model.dims
+        device = model.device
+        self.decoder = model.decoder
+        self.dtype = dtype
+        self.position = 0
+        
+        # Every tensor the step reads or writes lives at a fixed address so the graph can be replayed
+        self.static_token = torch.zeros(1, 1, dtype=torch.long, device=device)
+        self.static_position = torch.zeros(1, dtype=torch.long, device=device)
+        self.positions = torch.arange(dims.n_text_ctx, device=device)
+        self.self_kv = [
+            (torch.zeros(1, dims.n_text_ctx, dims.n_text_state, dtype=dtype, device=device),
+             torch.zeros(1, dims.n_text_ctx, dims.n_text_state, dtype=dtype, device=device))
+            for _ in self.decoder.blocks
+        ]
+        self.cross_kv = [
+            (torch.zeros(1, dims.n_audio_ctx, dims.n_text_state, dtype=dtype, device=device),
+             torch.zeros(1, dims.n_audio_ctx, dims.n_text_state, dtype=dtype, device=device))
+            for _ in self.decoder.blocks
+        ]
+        
+        self.graph = None
+        if device.type == "cuda":
+            self._capture()
+    
+    @staticmethod
+    def _attend(attn: torch.nn.Module, q: torch.Tensor, k: torch.Tensor, v: torch.Tensor,
+                mask: torch.Tensor = None) -> torch.Tensor:
+        q, k, v = (t.view(t.shape[0], t.shape[1], attn.n_head, -1).transpose(1, 2) for t in (q, k, v))
+        out = F.scaled_dot_product_attention(q, k, v, attn_mask=mask)
+        return attn.out(out.transpose(1, 2).flatten(start_dim=2))
+    
+    def _step(self) -> torch.Tensor:
+        """Run the decoder on static_token at static_position, mirroring TextDecoder.forward."""
+        decoder = self.decoder
+        x = decoder.token_embedding(self.static_token) + decoder.positional_embedding[self.static_position]
+        x = x.to(self.dtype)
+        
+        # Attend only to cache slots filled so far; later slots hold stale keys
+        mask = (self.positions <= self.static_position).unsqueeze(0)
+        
+        for block, (k_cache, v_cache), (cross_k, cross_v) in zip(decoder.blocks, self.self_kv, self.cross_kv):
+            h = block.attn_ln(x)
+            k_cache.index_copy_(1, self.static_position, block.attn.key(h))
+            v_cache.index_copy_(1, self.static_position, block.attn.value(h))
+            x = x + self._attend(block.attn, block.attn.query(h), k_cache, v_cache, mask)
+            x = x + self._attend(block.cross_attn, block.cross_attn.query(block.cross_attn_ln(x)), cross_k, cross_v)
+            x = x + block.mlp(block.mlp_ln(x))
+        
+        x = decoder.ln(x)
+        return (x @ torch.transpose(decoder.token_embedding.weight.to(x.dtype), 0, 1)).float()
+    
+    @torch.no_grad()
+    def _capture(self) -> None:
+        # Warm up on a side stream so lazy initialisation stays out of the captured graph
+        stream = torch.cuda.Stream()
+        stream.wait_stream(torch.cuda.current_stream())
+        with torch.cuda.stream(stream):
+            for _ in range(3):
+                self._step()
+        torch.cuda.current_stream().wait_stream(stream)
+        
+        self.graph = torch.cuda.CUDAGraph()
+        with torch.cuda.graph(self.graph):
+            self.static_logits = self._step()
+    
+    def logits(self, tokens: torch.Tensor, audio_features: torch.Tensor) -> torch.Tensor:
+        if self.position == 0:
+            # First call of a decode: load cross-attention keys/values and prefill the prompt
+            for block, (cross_k, cross_v) in zip(self.decoder.blocks, self.cross_kv):
+                cross_k.copy_(block.cross_attn.key(audio_features))
+                cross_v.copy_(block.cross_attn.value(audio_features))
+            new_tokens = tokens[0]
+        else:
+            new_tokens = tokens[0, -1:]
+        
+        logits = []
+        for token in new_tokens:
+            self.static_token.copy_(token.view(1, 1))
+            self.static_position.fill_(self.position)
+            if self.graph is not None:
+                self.graph.replay()
+                logits.append(self.static_logits.clone())
+            else:
+                logits.append(self._step())
+            self.position += 1
+        
+        return torch.cat(logits, dim=1)
     
-    return total_confidence / segment_count if segment_count > 0 else 0.0
+    def cleanup_caching(self) -> None:
+        self.position = 0
 
 
-def transcribe_chunk_fast(model: whisper.Whisper, audio_path: str, chunk_id: str = None, language: str = None) -> Dict[str, Any]:
+def get_cuda_graph_inference(model: Any, dtype: torch.dtype) -> CUDAGraphInference:
+    """Return the model's captured decoder graph, capturing it on first use."""
+    inference = getattr(model, "cuda_graph_inference", None)
+    if inference is None or inference.dtype != dtype:
+        inference = CUDAGraphInference(model, dtype)
+        model.cuda_graph_inference = inference
+    return inference
+
+
+def greedy_decode(model: Any, mel: torch.Tensor, duration: float, language: str = None,
+                  fp16: bool = False) -> Dict[str, Any]:
+    """Decode one 30 s window greedily, without model.transcribe's temperature fallback loop."""
+    options = whisper.DecodingOptions(
+        task="transcribe",
+        language=language,  # Detected from the window when not given
+        temperature=0.0,
+        without_timestamps=True,
+        fp16=fp16
+    )
+    # Accepts a log-mel window or encoder output from encode_chunk_batch
+    if CUDA_GRAPHS_ENABLED and mel.is_cuda:
+        task = whisper.decoding.DecodingTask(model, options)
+        task.inference = get_cuda_graph_inference(model, torch.float16 if fp16 else torch.float32)
+        decoded = task.run(mel.unsqueeze(0))[0]
+    else:
+        decoded = whisper.decode(model, mel, options)
+    
+    if decoded.no_speech_prob > NO_SPEECH_THRESHOLD and decoded.avg_logprob < LOGPROB_THRESHOLD:
+        # model.transcribe drops windows it considers silent
+        return {"text": "", "language": decoded.language, "segments": []}
+    
+    # Keep only text tokens, as model.transcribe does
+    tokenizer = whisper.tokenizer.get_tokenizer(model.is_multilingual, num_languages=model.num_languages,
+                                                language=decoded.language, task="transcribe")
+    text = tokenizer.decode([token for token in decoded.tokens if token < tokenizer.eot])
+    return {
+        "text": text,
+        "language": decoded.language,
+        "segments": [{
+            "start": 0.0,
+            "end": duration,
+            "text": text,
+            "avg_logprob": decoded.avg_logprob
+        }]
+    }
+
+
+def transcribe_chunk_fast(model: Any, audio: Union[str, np.ndarray], chunk_id: str = None, language: str = None,
+                          precision: str = "auto", audio_features: torch.Tensor = None,
+                          report_errors: bool = True) -> Dict[str, Any]:
     """Transcribe audio chunk optimized for speed."""
     try:
         emit_progress(30, f"Processing chunk {chunk_id}")
         
-        # Verify file exists
-        if not Path(audio_path).exists():
-            raise FileNotFoundError(f"Audio file not found: {audio_path}")
-        
         start_time = time.time()
         
-        # Fast transcription options for real-time processing
-        result = model.transcribe(
-            audio_path,
-            language=language,  # Use specified language or auto-detect
-            verbose=False,  # Keep quiet
-            word_timestamps=False,  # Disable for speed
-            fp16=False,  # Use fp32 for consistency
-            temperature=0.0,  # Deterministic results
-            beam_size=1,  # Faster beam search
-            best_of=1,  # Single best result
-            patience=1.0,  # Standard patience
-            length_penalty=1.0,  # Standard length penalty
-            suppress_tokens="-1",  # Default suppression
-            initial_prompt=None,  # No prompt for generic transcription
-            condition_on_previous_text=False,  # Independent chunk processing
-            compression_ratio_threshold=2.4,  # Default threshold
-            logprob_threshold=-1.0,  # Default threshold
-            no_speech_threshold=0.6  # Default threshold
-        )
+        # Accept pre-decoded PCM so callers can overlap ffmpeg with inference
+        if isinstance(audio, str):
+            audio = load_audio(audio)
+        
+        if isinstance(model, whisper.Whisper):
+            device = model.device.type
+            precision = resolve_precision(device, precision)
+            fp16 = precision == "fp16" and device == "cuda"  # Half precision on GPU
+            
+            if audio_features is not None:
+                result = greedy_decode(model, audio_features, len(audio) / SAMPLE_RATE, language, fp16)
+            elif len(audio) <= whisper.audio.N_SAMPLES:
+                # A single window needs no sliding-window bookkeeping or fallback decodes
+                mel = log_mel_window(model, audio).to(model.device)
+                result = greedy_decode(model, mel, len(audio) / SAMPLE_RATE, language, fp16)
+            else:
+                # language: use specified language or auto-detect
+                result = model.transcribe(audio, language=language, fp16=fp16, **FAST_TRANSCRIBE_OPTIONS)
+        else:
+            result = transcribe_with_faster_whisper(model, audio, language)
         
         processing_time = time.time() - start_time
         emit_progress(80, f"Transcription completed in {processing_time:.1f}s")
         
-        # Calculate confidence
-        confidence = calculate_confidence(result)
-        
-        # Extract segments with timestamps
-        segments = []
-        if "segments" in result:
-            for segment in result["segments"]:
-                segments.append({
-                    "start": float(segment.get("start", 0)),
-                    "end": float(segment.get("end", 0)),
-                    "text": segment.get("text", "").strip()
-                })
-        
-        emit_progress(90, "Processing complete")
-        
-        return {
-            "text": result.get("text", "").strip(),
-            "language": result.get("language", "unknown"),
-            "segments": segments,
-            "confidence": confidence,
-            "processing_time": processing_time
-        }
+        return format_chunk_result(result, processing_time)
         
     except Exception as e:
-        emit_error(f"Chunk transcription failed: {str(e)}", traceback.format_exc())
+        if report_errors:
+            emit_error(f"Chunk transcription failed: {str(e)}", traceback.format_exc())
         raise
 
 
-def batch_transcribe_chunks(model_name: str, chunk_files: list) -> None:
+def encode_chunk_batch(model: Any, decoded_chunks: list,
+                       precision: str = "auto") -> Dict[int, torch.Tensor]:
+    """Run the encoder once over every decoded chunk of up to 30 s in the batch, keyed by position."""
+    if not isinstance(model, whisper.Whisper):
+        return {}
+    
+    device = model.device.type
+    fp16 = resolve_precision(device, precision) == "fp16" and device == "cuda"
+    
+    audios = {}
+    for i, decoded in enumerate(decoded_chunks):
+        try:
+            audio = decoded.result()
+        except Exception:
+            continue  # Reported when the chunk itself is processed
+        
+        if len(audio) <= whisper.audio.N_SAMPLES:
+            audios[i] = audio
+    
+    return encode_windows(model, audios, fp16) if audios else {}
+
+
+def encode_windows(model: Any, audios: Dict[Any, np.ndarray], fp16: bool = False) -> Dict[Any, torch.Tensor]:
+    """Encode audio windows of up to 30 s in one batch."""
+    mel_batch = torch.stack([log_mel_window(model, audio) for audio in audios.values()]).to(model.device)
+    if fp16:
+        mel_batch = mel_batch.half()
+    
+    with torch.no_grad():
+        audio_features = model.encoder(mel_batch)
+    
+    return dict(zip(audios, audio_features))
+
+
+def format_chunk_result(result: Dict[str, Any], processing_time: float) -> Dict[str, Any]:
+    """Reduce a Whisper result to the fields sent back for a chunk."""
+    # Extract segments with timestamps and their log probabilities in one pass
+    segments = []
+    avg_logprobs = []
+    for segment in result.get("segments") or ():
+        segments.append({
+            "start": float(segment.get("start", 0)),
+            "end": float(segment.get("end", 0)),
+            "text": segment.get("text", "").strip()
+        })
+        if "avg_logprob" in segment:
+            avg_logprobs.append(segment["avg_logprob"])
+    
+    confidence = calculate_confidence(avg_logprobs)
+    
+    emit_progress(90, "Processing complete")
+    
+    return {
+        "text": result.get("text", "").strip(),
+        "language": result.get("language", "unknown"),
+        "segments": segments,
+        "confidence": confidence,
+        "processing_time": processing_time
+    }
+
+
+def warm_up_model(model: Any, precision: str = "auto") -> None:
+    """Compile the model on CUDA and run a silent decode so the first real chunk skips cold-kernel costs."""
+    global CUDA_GRAPHS_ENABLED
+    dummy_audio = np.zeros(SAMPLE_RATE * WARMUP_AUDIO_SECONDS, dtype=np.float32)
+    
+    if not isinstance(model, whisper.Whisper):
+        segments, _ = model.transcribe(dummy_audio, beam_size=1, vad_filter=False)
+        list(segments)  # faster-whisper decodes lazily
+        return
+    
+    device = model.device.type
+    precision = resolve_precision(device, precision)
+    encoder, decoder = model.encoder, model.decoder
+    
+    if device == "cuda":
+        # Inductor brings no gain over eager mode for Whisper on the CPU, so only compile on GPU
+        model.encoder = torch.compile(encoder)
+        if not CUDA_GRAPHS_ENABLED:
+            # The captured decoder graph already removes per-kernel launch overhead
+            model.decoder = torch.compile(decoder)
+    
+    try:
+        # Same path short real-time chunks take, which also captures the decoder graph
+        mel = log_mel_window(model, dummy_audio).to(model.device)
+        greedy_decode(model, mel, WARMUP_AUDIO_SECONDS, "en", precision == "fp16" and device == "cuda")
+    except Exception as e:
+        # Fall back to eager modules rather than failing the warm worker
+        model.encoder, model.decoder = encoder, decoder
+        CUDA_GRAPHS_ENABLED = False
+        emit_progress(25, f"Model compilation failed, using eager mode: {str(e)}")
+
+
+def queue_chunk_decodes(executor: ThreadPoolExecutor, chunk_files: list, decoded_chunks: queue.Queue) -> None:
+    """Submit chunk decodes in order, blocking while the queue of decoded chunks is full."""
+    try:
+        for chunk_info in chunk_files:
+            decoded_chunks.put(executor.submit(load_audio, chunk_info["file"]))
+    except Exception as e:
+        decoded_chunks.put(e)  # Re-raised by the consumer instead of leaving it waiting
+
+
+def next_decoded_chunk(decoded_chunks: queue.Queue) -> Future:
+    """Take the next chunk decode off the queue, re-raising a failure from the producer."""
+    decoded = decoded_chunks.get()
+    if isinstance(decoded, Exception):
+        raise decoded
+    return decoded
+
+
+def batch_transcribe_chunks(model_name: str, chunk_files: list, backend: str = "openai",
+                            precision: str = "auto", quantize: str = "none") -> None:
     """Process multiple chunks in batch for efficiency."""
     try:
         emit_progress(0, "Starting batch transcription")
         
         # Load model once for all chunks
-        model = load_model_if_needed(model_name)
+        model = load_model_if_needed(model_name, backend, precision, quantize)
         
         total_chunks = len(chunk_files)
         for i, chunk_info in enumerate(chunk_files):
-            chunk_file = chunk_info["file"]
-            chunk_id = chunk_info.get("id", f"chunk_{i}")
+            if not isinstance(chunk_info, dict) or "file" not in chunk_info:
+                raise ValueError(f"Chunk {i} has no \"file\" entry")
+        
+        # Decode upcoming chunks in the background while the model works on the current ones
+        with ThreadPoolExecutor(max_workers=max(1, min(os.cpu_count() or 1, total_chunks))) as executor:
+            decoded_chunks = queue.Queue(maxsize=DECODE_QUEUE_SIZE)
+            if total_chunks > 1:
+                threading.Thread(target=queue_chunk_decodes, args=(executor, chunk_files, decoded_chunks),
+                                 daemon=True).start()
+            else:
+                queue_chunk_decodes(executor, chunk_files, decoded_chunks)  # Nothing to overlap with
             
-            try:
-                emit_progress(30 + (i * 60 // total_chunks), f"Processing chunk {i+1}/{total_chunks}")
-                
-                result = transcribe_chunk_fast(model, chunk_file, chunk_id)
-                
-                # Emit individual chunk result
-                emit_message("chunk_result",
-                            chunk_id=chunk_id,
-                            text=result["text"],
-                            language=result["language"],
-                            segments=result["segments"],
-                            confidence=result["confidence"])
+            for batch_start in range(0, total_chunks, ENCODER_BATCH_SIZE):
+                batch_indices = range(batch_start, min(batch_start + ENCODER_BATCH_SIZE, total_chunks))
+                batch_chunks = [next_decoded_chunk(decoded_chunks) for _ in batch_indices]
+                audio_features = encode_chunk_batch(model, batch_chunks, precision)
                 
-            except Exception as e:
-                emit_message("chunk_error",
-                            chunk_id=chunk_id,
-                            error=str(e))
+                for offset, i in enumerate(batch_indices):
+                    chunk_id = chunk_files[i].get("id", f"chunk_{i}")
+                    
+                    try:
+                        emit_progress(30 + (i * 60 // total_chunks), f"Processing chunk {i+1}/{total_chunks}")
+                        
+                        result = transcribe_chunk_fast(model, batch_chunks[offset].result(), chunk_id,
+                                                       precision=precision, audio_features=audio_features.get(offset))
+                        
+                        # Emit individual chunk result
+                        emit_message("chunk_result",
+                                    chunk_id=chunk_id,
+                                    text=result["text"],
+                                    language=result["language"],
+                                    segments=result["segments"],
+                                    confidence=result["confidence"])
+                        
+                    except Exception as e:
+                        emit_message("chunk_error",
+                                    chunk_id=chunk_id,
+                                    error=str(e))
         
         emit_progress(100, "Batch processing complete")
         
@@ -203,16 +672,17 @@ def batch_transcribe_chunks(model_name: str, chunk_files: list) -> None:
         emit_error(f"Batch transcription failed: {str(e)}", traceback.format_exc())
 
 
-def single_chunk_transcribe(model_name: str, audio_file: str, chunk_id: str = None, language: str = None) -> None:
+def single_chunk_transcribe(model_name: str, audio_file: str, chunk_id: str = None, language: str = None,
+                            backend: str = "openai", precision: str = "auto", quantize: str = "none") -> None:
     """Process a single chunk for real-time transcription."""
     try:
         emit_progress(0, "Starting real-time transcription")
         
         # Load model
-        model = load_model_if_needed(model_name)
+        model = load_model_if_needed(model_name, backend, precision, quantize)
         
         # Transcribe chunk
-        result = transcribe_chunk_fast(model, audio_file, chunk_id, language)
+        result = transcribe_chunk_fast(model, audio_file, chunk_id, language, precision)
         
         # Send result
         emit_progress(100, "Transcription complete")
@@ -227,15 +697,88 @@ def single_chunk_transcribe(model_name: str, audio_file: str, chunk_id: str = No
         emit_error(f"Single chunk transcription failed: {str(e)}", traceback.format_exc())
 
 
-def keep_model_warm(model_name: str = "tiny") -> None:
-    """Keep model loaded and warm for faster subsequent processing."""
+def release_cuda_cache() -> None:
+    """Return idle cached GPU memory to the driver and report allocator stats."""
+    if not torch.cuda.is_initialized():
+        return
+    
+    reserved = torch.cuda.memory_reserved()
+    allocated = torch.cuda.memory_allocated()
+    if reserved - allocated > CUDA_CACHE_SLACK_BYTES:
+        torch.cuda.empty_cache()
+    
+    emit_message("mem_stats",
+                allocated=allocated,
+                reserved=torch.cuda.memory_reserved(),
+                num_alloc_retries=torch.cuda.memory_stats().get("num_alloc_retries", 0))
+
+
+class ChunkRequestHandler(socketserver.StreamRequestHandler):
+    """Serve newline-delimited JSON chunk requests against the warm model."""
+    
+    def handle(self) -> None:
+        for line in self.rfile:
+            if not line.strip():
+                continue
+            
+            chunk_id = None
+            try:
+                request = orjson.loads(line)
+                chunk_id = request.get("chunk_id")
+                
+                # Requests may name another model; recently used ones stay cached. Failures are
+                # answered on the socket only, since an error on stdout means the worker failed
+                model = load_model_if_needed(request.get("model", self.server.model_name), self.server.backend,
+                                             self.server.precision, self.server.quantize, report_errors=False)
+                result = transcribe_chunk_fast(model, request["audio_file"], chunk_id,
+                                               request.get("language"), self.server.precision, report_errors=False)
+                message = {
+                    "type": "chunk_result",
+                    "chunk_id": chunk_id,
+                    "text": result["text"],
+                    "language": result["language"],
+                    "segments": result["segments"],
+                    "confidence": result["confidence"]
+                }
+            except Exception as e:
+                message = {"type": "chunk_error", "chunk_id": chunk_id, "error": str(e)}
+            
+            self.wfile.write(orjson.dumps(message, option=orjson.OPT_APPEND_NEWLINE))
+            self.wfile.flush()
+            release_cuda_cache()
+
+
+def keep_model_warm(model_name: str = "tiny", backend: str = "openai", precision: str = "auto",
+                    quantize: str = "none", socket_path: str = None) -> None:
+    """Keep model loaded and warm, serving chunk requests over a Unix domain socket."""
+    socket_path = socket_path or f"/tmp/whisper-{os.getpid()}.sock"
     try:
-        model = load_model_if_needed(model_name)
-        emit_message("model_ready", model_name=model_name)
+        device = select_device(model_name, backend, quantize)
+        if backend == "openai" and device == "cuda":
+            # Cap this worker's share of GPU memory so long runs can't grow without bound. Only
+            # PyTorch models on the GPU need it, and setting it creates a CUDA context
+            torch.cuda.set_per_process_memory_fraction(CUDA_MEMORY_FRACTION)
+        
+        model = load_model_if_needed(model_name, backend, precision, quantize)
+        
+        emit_progress(25, "Warming up model")
+        warm_up_model(model, precision)
         
-        # Keep process alive to maintain model in memory
-        while True:
-            time.sleep(1)
+        # Remove a stale socket left behind by a previous worker
+        if os.path.exists(socket_path):
+            os.unlink(socket_path)
+        
+        with socketserver.UnixStreamServer(socket_path, ChunkRequestHandler) as server:
+            server.model_name = model_name
+            server.backend = backend
+            server.precision = precision
+            server.quantize = quantize
+            emit_message("model_ready", model_name=model_name, backend=backend, device=device, socket=socket_path)
+            
+            try:
+                server.serve_forever()
+            finally:
+                os.unlink(socket_path)
             
     except KeyboardInterrupt:
         emit_message("model_shutdown", model_name=model_name)
@@ -256,23 +799,56 @@ def main():
                        help="Whisper model to use")
     parser.add_argument("--language", help="Language code for Whisper (optional)")
     parser.add_argument("--output", help="Output file for transcript (optional)")
+    parser.add_argument("--backend", default="openai", choices=["openai", "faster", "auto"],
+                       help="Inference backend: openai-whisper (PyTorch), faster-whisper (CTranslate2, INT8), "
+                            "or auto (faster-whisper on CUDA when installed, otherwise openai-whisper)")
+    
+    parser.add_argument("--precision", default="auto", choices=["auto", "fp32", "fp16", "bf16"],
+                       help="Inference precision (default: fp16 on CUDA, bf16 on CPUs with AVX-512 BF16, else fp32)")
+    
+    parser.add_argument("--quantize", default="none", choices=["none", "int8"],
+                       help="Dynamic INT8 quantization of the openai-whisper model's Linear layers (CPU only; "
+                            "faster-whisper already uses INT8 weights by default)")
+    
+    parser.add_argument("--socket", help="Unix socket path for warm mode requests (default: /tmp/whisper-<pid>.sock)")
+    
+    parser.add_argument("--max-cached-models", type=int, default=DEFAULT_MAX_CACHED_MODELS,
+                       help=f"Loaded models kept in memory for reuse (default: {DEFAULT_MAX_CACHED_MODELS})")
+    
+    parser.add_argument("--cuda-graphs", action="store_true",
+                       help="Replay greedy decoder steps from a captured CUDA graph (openai backend on CUDA)")
+    
+    parser.add_argument("--pcm-sample-rate", type=int, default=SAMPLE_RATE,
+                       help=f"Sample rate of .pcm/.raw chunk files, which must be headerless 16-bit little-endian "
+                            f"mono PCM; they are read without ffmpeg and resampled to {SAMPLE_RATE} Hz with scipy "
+                            f"when needed (default: {SAMPLE_RATE})")
     
     args = parser.parse_args()
+    set_max_cached_models(args.max_cached_models)
+    set_pcm_sample_rate(args.pcm_sample_rate)
+    if args.cuda_graphs:
+        enable_cuda_graphs()
+    backend = resolve_backend(args.backend)
+    precision = args.precision
+    if backend == "openai" and args.quantize == "int8":
+        # INT8 weights run with FP32 activations
+        precision = "fp32"
     
     try:
         if args.command == "single":
             if not args.audio_file:
                 raise ValueError("--audio-file required for single mode")
-            single_chunk_transcribe(args.model, args.audio_file, args.chunk_id, args.language)
+            single_chunk_transcribe(args.model, args.audio_file, args.chunk_id, args.language, backend, precision,
+                                    args.quantize)
             
         elif args.command == "batch":
             if not args.chunk_files:
                 raise ValueError("--chunk-files required for batch mode")
             chunk_files = json.loads(args.chunk_files)
-            batch_transcribe_chunks(args.model, chunk_files)
+            batch_transcribe_chunks(args.model, chunk_files, backend, precision, args.quantize)
             
         elif args.command == "warm":
-            keep_model_warm(args.model)
+            keep_model_warm(args.model, backend, precision, args.quantize, args.socket)
         
         # Save to file if requested
         if args.output and args.command == "single":
@@ -13,6 +13,7 @@ import warnings
 import threading
 import time
 import signal
+import subprocess
 from pathlib import Path
 from typing import Dict, Any, Optional
 
@@ -21,8 +22,16 @@ warnings.filterwarnings("ignore")
 os.environ["PYTHONWARNINGS"] = "ignore"
 
 try:
+    import orjson
     import whisper
     import torch
+    from whisper_backends import (
+        BF16AudioEncoder,
+        load_faster_whisper_model,
+        quantize_whisper_model,
+        resolve_backend,
+        resolve_precision
+    )
 except ImportError as e:
     print(json.dumps({
         "type": "error",
@@ -40,6 +49,17 @@ PROCESSING_SPEED_FACTORS = {
     "turbo": 2.5    # 2.5x real-time (optimized)
 }
 
+# Seconds between time-based progress estimates
+PROGRESS_INTERVAL = 2.0
+
+# Messages are written as bytes straight to stdout's buffer, one write per message;
+# the lock keeps background progress threads from interleaving with the main thread. It is
+# reentrant because the signal handler emits on the main thread, possibly mid-emit
+_write = sys.stdout.buffer.write
+_flush = sys.stdout.buffer.flush
+_EMIT_LOCK = threading.RLock()
+_LAST_PROGRESS = None
+
 
 def emit_message(message_type: str, **kwargs) -> None:
     """Send a JSON message to the parent process via stdout."""
@@ -47,11 +67,20 @@ def emit_message(message_type: str, **kwargs) -> None:
         "type": message_type,
         **kwargs
     }
-    print(json.dumps(message), flush=True)
+    data = orjson.dumps(message, option=orjson.OPT_APPEND_NEWLINE)
+    with _EMIT_LOCK:
+        _write(data)
+        _flush()
 
 
 def emit_progress(progress: int, message: str = "") -> None:
     """Send progress update to parent process."""
+    global _LAST_PROGRESS
+    
+    # Repeated values don't move the progress bar
+    if progress == _LAST_PROGRESS:
+        return
+    _LAST_PROGRESS = progress
     emit_message("progress", progress=progress, message=message)
 
 
@@ -66,12 +95,31 @@ def emit_result(text: str, language: str, segments: list) -> None:
 
 
 def get_audio_duration(audio_path: str) -> float:
-    """Get estimated duration of audio file in seconds."""
+    """Get duration of audio file in seconds, estimating it from the file size if ffprobe can't tell."""
+    try:
+        probe = subprocess.run(
+            ["ffprobe", "-v", "quiet", "-show_entries", "format=duration", "-of", "csv=p=0", audio_path],
+            capture_output=True, text=True, timeout=10, check=True
+        )
+        try:
+            return max(float(probe.stdout.strip()), 1.0)  # At least 1 second
+        except ValueError:
+            pass  # MediaRecorder WebM files carry no duration in the header
+        
+        # Fall back to the timestamp of the last audio packet
+        probe = subprocess.run(
+            ["ffprobe", "-v", "quiet", "-select_streams", "a:0", "-show_entries", "packet=pts_time",
+             "-of", "csv=p=0", audio_path],
+            capture_output=True, text=True, timeout=60, check=True
+        )
+        return max(float(probe.stdout.split()[-1]), 1.0)
+    except Exception:
+        pass  # ffprobe missing, or no readable timestamps
+    
     try:
         file_size = os.path.getsize(audio_path)
         # Rough estimate: WebM/Opus at 128kbps = ~16KB/s
-        estimated_duration = file_size / (16 * 1024)
-        return max(estimated_duration, 1.0)  # At least 1 second
+        return max(file_size / (16 * 1024), 1.0)
     except Exception:
         return 60.0  # Default to 1 minute if we can't determine
 
@@ -85,6 +133,7 @@ class ProgressReporter:
         self.start_time = time.time()
         self.stop_event = threading.Event()
         self.thread = None
+        self.last_progress = None
         
         # Get processing speed factor
         self.speed_factor = PROCESSING_SPEED_FACTORS.get(model_name, 2.0)
@@ -113,26 +162,40 @@ class ProgressReporter:
                 progress = 30 + int(progress_ratio * 55)  # Map to 30-85%
                 
                 remaining_time = self.estimated_processing_time - elapsed
-                emit_progress(progress, f"Processing audio (est. {int(remaining_time)}s remaining)")
+                message = f"Processing audio (est. {int(remaining_time)}s remaining)"
             else:
                 # If we've exceeded estimated time, show 85% and keep waiting
-                emit_progress(85, "Processing audio (finalizing...)")
+                progress = 85
+                message = "Processing audio (finalizing...)"
+            
+            # Skip writes that wouldn't move the progress bar
+            if self.last_progress is None or progress - self.last_progress >= 1:
+                emit_progress(progress, message)
+                self.last_progress = progress
                 
-            time.sleep(1.0)
+            self.stop_event.wait(PROGRESS_INTERVAL)
 
 
-def load_model(model_name: str = "turbo") -> whisper.Whisper:
+def load_model(model_name: str = "turbo", backend: str = "openai", precision: str = "auto",
+               quantize: str = "none") -> Any:
     """Load the Whisper model."""
     try:
         emit_progress(5, f"Loading Whisper model: {model_name}")
         
-        # Check if CUDA is available, but prefer CPU for consistency
-        device = "cpu"
-        if torch.cuda.is_available():
-            emit_progress(10, "CUDA detected, but using CPU for stability")
+        device = "cuda" if torch.cuda.is_available() else "cpu"
+        if backend == "openai" and quantize == "int8":
+            # Dynamically quantized kernels only run on the CPU
+            device = "cpu"
         
-        model = whisper.load_model(model_name, device=device)
-        emit_progress(20, f"Model loaded successfully on {device}")
+        if backend == "faster":
+            model = load_faster_whisper_model(model_name, device, precision)
+        else:
+            model = whisper.load_model(model_name, device=device)
+            if quantize == "int8":
+                model = quantize_whisper_model(model)
+            elif resolve_precision(device, precision) == "bf16":
+                model.encoder = BF16AudioEncoder(model.encoder)
+        emit_progress(20, f"Model loaded successfully on {device} ({backend} backend)")
         
         return model
     except Exception as e:
@@ -140,7 +203,35 @@ def load_model(model_name: str = "turbo") -> whisper.Whisper:
         raise
 
 
-def transcribe_audio(model: whisper.Whisper, audio_path: str, model_name: str = "turbo") -> Dict[str, Any]:
+def transcribe_with_faster_whisper(model: Any, audio_path: str, language: str = None) -> Dict[str, Any]:
+    """Transcribe with faster-whisper, returning a result shaped like openai-whisper's."""
+    segments_iter, info = model.transcribe(
+        audio_path,
+        language=language,
+        beam_size=1,  # Greedy, matching openai-whisper's default decoding
+        vad_filter=False
+    )
+    
+    # Segments are decoded lazily, so each one yielded is real progress through the audio
+    segments = []
+    for segment in segments_iter:
+        segments.append({
+            "start": segment.start,
+            "end": segment.end,
+            "text": segment.text
+        })
+        if info.duration > 0:
+            progress = 30 + int(min(segment.end / info.duration, 1.0) * 55)  # Map to 30-85%
+            emit_progress(progress, f"Transcribed {int(segment.end)}s of {int(info.duration)}s")
+    
+    return {
+        "text": "".join(segment["text"] for segment in segments),
+        "language": info.language,
+        "segments": segments
+    }
+
+
+def transcribe_audio(model: Any, audio_path: str, model_name: str = "turbo", precision: str = "auto") -> Dict[str, Any]:
     """Transcribe audio file using Whisper with time-based progress estimation."""
     try:
         emit_progress(25, "Analyzing audio file...")
@@ -155,22 +246,28 @@ def transcribe_audio(model: whisper.Whisper, audio_path: str, model_name: str =
         
         emit_progress(30, f"Audio duration: {int(audio_duration)}s, estimated processing: {int(estimated_time)}s")
         
-        # Start progress reporter
-        progress_reporter = ProgressReporter(audio_duration, model_name)
-        progress_reporter.start()
-        
-        try:
-            # Transcribe with verbose=False to avoid output conflicts
-            result = model.transcribe(
-                audio_path,
-                language=None,  # Auto-detect language
-                verbose=False,  # Keep quiet to avoid JSON parsing issues
-                word_timestamps=False,
-                fp16=False
-            )
-        finally:
-            # Stop progress reporter
-            progress_reporter.stop()
+        if isinstance(model, whisper.Whisper):
+            device = model.device.type
+            precision = resolve_precision(device, precision)
+            
+            # openai-whisper has no progress callback, so estimate progress from elapsed time
+            progress_reporter = ProgressReporter(audio_duration, model_name)
+            progress_reporter.start()
+            
+            try:
+                # Transcribe with verbose=False to avoid output conflicts
+                result = model.transcribe(
+                    audio_path,
+                    language=None,  # Auto-detect language
+                    verbose=False,  # Keep quiet to avoid JSON parsing issues
+                    word_timestamps=False,
+                    fp16=(precision == "fp16" and device == "cuda")
+                )
+            finally:
+                progress_reporter.stop()
+        else:
+            # Reports progress per decoded segment
+            result = transcribe_with_faster_whisper(model, audio_path)
         
         emit_progress(85, "Processing transcription results...")
         
@@ -217,8 +314,23 @@ def main():
     parser.add_argument("audio_file", help="Path to audio file to transcribe")
     parser.add_argument("--model", default="turbo", help="Whisper model to use (default: turbo)")
     parser.add_argument("--output", help="Output file for transcript (optional)")
+    parser.add_argument("--backend", default="openai", choices=["openai", "faster", "auto"],
+                       help="Inference backend: openai-whisper (PyTorch), faster-whisper (CTranslate2, INT8), "
+                            "or auto (faster-whisper on CUDA when installed, otherwise openai-whisper)")
+    
+    parser.add_argument("--precision", default="auto", choices=["auto", "fp32", "fp16", "bf16"],
+                       help="Inference precision (default: fp16 on CUDA, bf16 on CPUs with AVX-512 BF16, else fp32)")
+    
+    parser.add_argument("--quantize", default="none", choices=["none", "int8"],
+                       help="Dynamic INT8 quantization of the openai-whisper model's Linear layers (CPU only; "
+                            "faster-whisper already uses INT8 weights by default)")
     
     args = parser.parse_args()
+    backend = resolve_backend(args.backend)
+    precision = args.precision
+    if backend == "openai" and args.quantize == "int8":
+        # INT8 weights run with FP32 activations
+        precision = "fp32"
     
     try:
         emit_progress(0, "Starting transcription worker")
@@ -228,14 +340,14 @@ def main():
             return
             
         # Load model
-        model = load_model(args.model)
+        model = load_model(args.model, backend, precision, args.quantize)
         
         # Check for shutdown before transcription
         if shutdown_requested:
             return
             
         # Transcribe audio
-        result = transcribe_audio(model, args.audio_file, args.model)
+        result = transcribe_audio(model, args.audio_file, args.model, precision)
         
         # Check for shutdown before saving
         if shutdown_requested:
@@ -244,8 +356,8 @@ def main():
         # Save to file if requested
         if args.output:
             emit_progress(98, "Saving transcript to file...")
-            with open(args.output, 'w', encoding='utf-8') as f:
-                json.dump(result, f, indent=2, ensure_ascii=False)
+            with open(args.output, 'wb') as f:
+                f.write(orjson.dumps(result, option=orjson.OPT_INDENT_2 | orjson.OPT_NON_STR_KEYS))
         
         # Send result
         emit_progress(100, "Complete")